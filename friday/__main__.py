@@ -1,12 +1,13 @@
 """
 __main__.py for Friday
 
-To launch Friday as a module from the terminal.
+To launch Friday as a module from the terminal, see friday.cli for the subcommands.
 > python -m friday
+> python -m friday simulate --paths 1000
 """
 
-from friday import main
+from friday import cli
 
 if __name__ == '__main__':
 
-    main.main()
+    cli.main()
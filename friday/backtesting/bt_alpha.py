@@ -1,197 +1,131 @@
 # TODO Proper Documentation and commenting
 
-from alpaca_trade_api import REST, TimeFrame, TimeFrameUnit
+from alpaca_trade_api import TimeFrame, TimeFrameUnit
 from datetime import datetime, timedelta
 from rich import print
-import numpy as np
 import pandas as pd
-import pandas_market_calendars as mcal
 import vectorbt as vbt
 
 from functools import partial
 import json
 
-# Sets maximum number of rows to be displayed in pandas data_types.
-pd.set_option('display.max_rows', None)
-
-with open(r'config.json') as config:
-    config = json.load(config)
-
-api = REST(config['alpaca']['key'], config['alpaca']['secret'], api_version='v2')
+from friday.data import BarCache, PriceStore, make_source, wide_frame
+from friday.profiling import profiler
+from friday.strategies import Strategy, generate_signals
+from friday.utils import get_active_dates
 
 class BacktestingAlpha:
     """BacktestingAlpha class based on vectorbt."""
 
-    def __init__(self, start, end) -> None:
-        """Initializes the class and pre-sets the following values as instance variables."""
+    def __init__(self, start, end, config, api=None) -> None:
+        """Initializes the class and pre-sets the following values as instance variables.
+        Parameters:
+        start: str (Format %Y-%m-%d)
+        end: str (Format %Y-%m-%d)
+        config: Configuration loaded from config.json.
+        api: Data source serving get_bars() = None (None builds the source selected in config, see friday.data.sources)"""
 
         # Stocks under consideration
-        self.symbols = ['SPY', 'TQQQ', 'SPXL', 'UVXY', 'SQQQ', 'BSV', 'TECL']
+        self.symbols = config['assets']['symbols']
         # Trading timeframe
         self.interval = '1d'
         self.start_date = start
         self.end_date = end
-        # Stock currently in position
-        self.in_trade = None
-        # Trade status
-        self.position_status = 'closed'
+        self.config = config
+        self.ste = Strategy(config)                 # Rule tree and parameters from config, see friday.strategies.rules
+        self.cache = BarCache(api if api is not None else make_source(config), fetch=config.get('fetch'), **config.get('cache', {}))
 
     def data_collection(self) -> pd.Series:
         """Method to fetch market data from yahoo finance. Collectes OHLCV data and calculates
-        Moving Average(MA) and Relative Strength Index(RSI) with window size 20, 200 for MA and
-        10 for RSI."""
-
-        _open = pd.DataFrame(columns=self.symbols)
-        _high = pd.DataFrame(columns=self.symbols)
-        _low = pd.DataFrame(columns=self.symbols)
-        _close = pd.DataFrame(columns=self.symbols)
-        _volume = pd.DataFrame(columns=self.symbols)
-        
+        Moving Average(MA) and Relative Strength Index(RSI) with the windows of the strategy parameters
+        (20, 200 for MA and 10 for RSI by default)."""
+
+        p = self.ste.params
+        warmup = max(p['ma_fast'], p['ma_slow'], p['rsi_period'])             # Bars needed before the first valid signal
         timeframe = TimeFrame(1, TimeFrameUnit.Day)
-        nyse = mcal.get_calendar('NYSE')
-        adjusted = datetime.strptime(self.start_date, "%Y-%m-%d") - timedelta(365)
-        early = nyse.schedule(start_date=adjusted, end_date=self.start_date)
-        active_days = mcal.date_range(early, frequency='1D')
-
-        self.start_date = datetime.strftime(active_days[-201], "%Y-%m-%d")
-
-        for symbol in self.symbols:
-            alpaca_data = api.get_bars(symbol, TimeFrame.Day, start=self.start_date, end=self.end_date,  adjustment='split', limit=10000).df
-            _open[symbol] = alpaca_data['open']
-            _high[symbol] = alpaca_data['high']
-            _low[symbol] = alpaca_data['low']
-            _close[symbol] = alpaca_data['close']
-            _volume[symbol] = alpaca_data['volume']
-            alpaca_data.to_csv(f"friday\\backtesting\\historicaldata\\{symbol}.csv")
+        adjusted = datetime.strptime(self.start_date, "%Y-%m-%d") - timedelta(max(365, 2 * warmup))
+        active_days = get_active_dates(adjusted, self.start_date)
+
+        self.start_date = datetime.strftime(active_days[-(warmup + 1)], "%Y-%m-%d")
+
+        # The memory-mapped price store is read when it covers the range, see friday.data.store
+        fields = ['open', 'high', 'low', 'close', 'volume']
+        path = self.config.get('store', {}).get('path', 'userdata/store')
+        store = PriceStore.open(path)
+        if store is not None and store.covers(self.symbols, self.start_date, self.end_date):
+            _open, _high, _low, _close, _volume = (store.frame(field, self.symbols, self.start_date, self.end_date) for field in fields)
+        else:
+            # Every symbol is fetched concurrently and aligned on a shared index, then merged into the store
+            bars = self.cache.get_many(self.symbols, TimeFrame.Day, start=self.start_date, end=self.end_date, adjustment='split', limit=10000)
+            _open, _high, _low, _close, _volume = (wide_frame(bars, field, self.symbols) for field in fields)
+            PriceStore.write(path, bars)
 
         ohlcv = {'Open': _open, 'High': _high, 'Low': _low, 'Close': _close}
 
         # Indicator calculation
         # Moving Average(ma) and Relative Strength Index(rsi)
-        ma = vbt.MA.run(ohlcv['Close'], window=[20, 200]).ma
-        rsi = vbt.talib('rsi').run(ohlcv['Close'], timeperiod=10).real     # talib, vbt presents inaccurate results
+        ma = vbt.MA.run(ohlcv['Close'], window=[p['ma_fast'], p['ma_slow']]).ma
+        rsi = vbt.talib('rsi').run(ohlcv['Close'], timeperiod=p['rsi_period']).real     # talib, vbt presents inaccurate results
 
-        # Initial 200 values are dropped from all pandas series as the
-        # highest window size observed is 200 for the moving average.
+        # Initial values are dropped from all pandas series up to the
+        # highest window size (200 for the moving average by default).
         # This fixes the inaccurate entries caused due to NaN values.
-        ohlcv['Open'].drop(index=ohlcv['Open'].index[:200], inplace=True)
-        ohlcv['Close'].drop(index=ohlcv['Close'].index[:200], inplace=True)
-        ma.drop(index=ma.index[:200], inplace=True)
-        rsi.drop(index=rsi.index[:200], inplace=True)
-        ma.to_csv(f"friday\\backtesting\\historicaldata\\ind_ma.csv")
-        rsi.to_csv(f"friday\\backtesting\\historicaldata\\ind_rsi.csv")
+        ohlcv['Open'].drop(index=ohlcv['Open'].index[:warmup], inplace=True)
+        ohlcv['Close'].drop(index=ohlcv['Close'].index[:warmup], inplace=True)
+        ma.drop(index=ma.index[:warmup], inplace=True)
+        rsi.drop(index=rsi.index[:warmup], inplace=True)
 
         # Returns the values of Close, Open, Moving Average and Relative
         # Strength Index.
         return ohlcv['Close'], ohlcv['Open'], ma, rsi
 
-    def _signal_generator(self, symbol, en, ex, idx) -> None:
-
-        en[symbol][idx] = 1
-
-        if idx == 0:
-            if en[symbol][idx] == 1:
-                self.in_trade = symbol
-                self.position_status = 'opened'
-
-        elif idx > 0:
-            if np.isnan(en[symbol][idx-1]):
-                ex[self.in_trade][idx] = 1
-                self.position_status = 'closed'
-
-            if en[symbol][idx] == 1 and self.position_status == 'closed':
-                self.position_status = 'opened'
-            else:
-                en[symbol][idx] = -1
-                ex[self.in_trade][idx] = -1
-
-        self.in_trade = symbol
-
     def strategy(self):
 
         close_price, open_price, ma, rsi = self.data_collection()
-        entries = pd.DataFrame(np.nan, index=close_price.index, columns=self.symbols)
-        exits = pd.DataFrame(np.nan, index=close_price.index, columns=self.symbols)
-
-        for x in range(len(close_price['SPY'])):
-            if close_price['SPY'][x] > ma[200]['SPY'][x]:
-                if rsi[10]['TQQQ'][x] > 79:
-                    self._signal_generator('UVXY', entries, exits, x)
-
-                else:
-                    if rsi[10]['SPXL'][x] > 80:
-                        self._signal_generator('UVXY', entries, exits, x)
-
-                    else:
-                        self._signal_generator('TQQQ', entries, exits, x)
-
-            else:
-                if rsi[10]['TQQQ'][x] < 31:
-                    self._signal_generator('TECL', entries, exits, x)
-
-                else:
-                    if rsi[10]['SPY'][x] < 30:
-                        self._signal_generator('SPXL', entries, exits, x)
-
-                    else:
-                        if rsi[10]['UVXY'][x] > 74:
-                            if rsi[10]['UVXY'][x] > 84:
-                                if close_price['TQQQ'][x] > ma[20]['TQQQ'][x]:
-                                    if rsi[10]['SQQQ'][x] < 31:
-                                        self._signal_generator('SQQQ', entries, exits, x)
-
-                                    else:
-                                        self._signal_generator('TQQQ', entries, exits, x)
-                                
-                                else:
-                                    if rsi[10]['SQQQ'][x] > rsi[10]['BSV'][x]:
-                                        self._signal_generator('SQQQ', entries, exits, x)
-
-                                    else:
-                                        self._signal_generator('BSV', entries, exits, x)
+        p = self.ste.params
 
-                            else:
-                                self._signal_generator('UVXY', entries, exits, x)
+        targets = self.ste.select_targets(close_price[self.symbols].values,
+                                          ma[p['ma_fast']][self.symbols].values,
+                                          ma[p['ma_slow']][self.symbols].values,
+                                          rsi[p['rsi_period']][self.symbols].values)
+        entries, exits = generate_signals(targets, len(self.symbols))
+        entries = pd.DataFrame(entries, index=close_price.index, columns=self.symbols)
+        exits = pd.DataFrame(exits, index=close_price.index, columns=self.symbols)
 
-                        else:
-                            if close_price['TQQQ'][x] > ma[20]['TQQQ'][x]:
-                                if rsi[10]['SQQQ'][x] < 31:
-                                    self._signal_generator('SQQQ', entries, exits, x)
-
-                                else:
-                                    self._signal_generator('TQQQ', entries, exits, x)
+        return close_price, open_price, entries, exits
 
-                            else:
-                                if rsi[10]['SQQQ'][x] > rsi[10]['BSV'][x]:
-                                    self._signal_generator('SQQQ', entries, exits, x)
 
-                                else:
-                                    self._signal_generator('BSV', entries, exits, x)
+def main(config=None, start='2016-01-01', end='2022-10-07', show=True):
+    """Backtests the strategy and prints the portfolio statistics, see friday.cli for the command line.
+    Parameters:
+    config: dict = None (Configuration loaded from config.json, None reads config.json)
+    start: str = '2016-01-01' (Format %Y-%m-%d)
+    end: str = '2022-10-07' (Format %Y-%m-%d)
+    show: bool = True (Plots the orders of every symbol)"""
 
-        entries.replace({1: True, np.nan: False, -1: False}, inplace=True)
-        exits.replace({1: True, np.nan: False, -1: False}, inplace=True)
+    if config is None:
+        with open(r'config.json') as config:
+            config = json.load(config)
 
-        return close_price, open_price, entries, exits
+    # Sets maximum number of rows to be displayed in pandas data_types.
+    pd.set_option('display.max_rows', None)
 
-
-def main():
-    ba = BacktestingAlpha('2016-01-01', '2022-10-07')
+    ba = BacktestingAlpha(start, end, config)
     close_price, open_price, en, ex = ba.strategy()
 
-    en = en.values.tolist()
-    ex = ex.values.tolist()
-    pf = vbt.Portfolio.from_signals(
-        close=close_price,
-        entries=en,
-        exits=ex,
-        price=close_price,   # changed from open_price
-        cash_sharing=True,
-        val_price=close_price.vbt.fshift(1),
-        slippage=0.0,        # set slippage
-        init_cash=10000,     # initial cash from 1000 to 10000
-        group_by=True,
-        call_seq='auto',
-        freq='d')
+    with profiler.stage('portfolio.from_signals'):
+        pf = vbt.Portfolio.from_signals(
+            close=close_price,
+            entries=en,
+            exits=ex,
+            price=close_price,   # changed from open_price
+            cash_sharing=True,
+            val_price=close_price.vbt.fshift(1),
+            slippage=0.0,        # set slippage
+            init_cash=10000,     # initial cash from 1000 to 10000
+            group_by=True,
+            call_seq='auto',
+            freq='d')
 
     pf.orders.records_readable.to_csv('userdata/signal_analysis.csv')
     print(pf.orders.records_readable)
@@ -199,52 +133,19 @@ def main():
     print(pf.returns_stats(group_by=True))
     print(pf.total_return(group_by=False))
 
+    if not show:
+        return
+
     def plot_orders(portfolio, column=None, add_trace_kwargs=None, fig=None):
         portfolio.orders.plot(column=column, add_trace_kwargs=add_trace_kwargs, fig=fig)
 
     pf.plot(subplots=[
-        (f'{ba.symbols[0]}_Orders', dict(
-            title=f"Orders ({ba.symbols[0]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[0]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[1]}_Orders', dict(
-            title=f"Orders ({ba.symbols[1]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[1]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[2]}_Orders', dict(
-            title=f"Orders ({ba.symbols[2]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[2]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[3]}_Orders', dict(
-            title=f"Orders ({ba.symbols[3]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[3]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[4]}_Orders', dict(
-            title=f"Orders ({ba.symbols[4]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[4]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[5]}_Orders', dict(
-            title=f"Orders ({ba.symbols[5]})",
-            check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[5]),
-            pass_column=False
-        )),
-        (f'{ba.symbols[6]}_Orders', dict(
-            title=f"Orders ({ba.symbols[6]})",
+        (f'{symbol}_Orders', dict(
+            title=f"Orders ({symbol})",
             check_is_not_grouped=False,
-            plot_func=partial(plot_orders, column=ba.symbols[6]),
+            plot_func=partial(plot_orders, column=symbol),
             pass_column=False
-        ))
+        )) for symbol in ba.symbols
     ]).show()
 
 
@@ -0,0 +1,203 @@
+"""
+Chunked backtesting of the strategy for Friday.
+
+Streams the bars of any timeframe window by window and carries the indicator, signal and portfolio state across
+chunks, so multi-year 1 minute histories run with memory bounded by the chunk instead of the history length.
+> python -m friday backtest --interval 1m --start 2020-01-01 --end 2022-10-07 --sessions 20
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from friday.data import make_source
+from friday.data.stream import stream_bars
+from friday.profiling import profiler
+from friday.strategies import Strategy
+from friday.strategies.indicators import ChunkedIndicators
+from friday.strategies.signals import rotate_signals_nb
+from friday.utils import get_trading_calendar, timeframe
+
+
+@njit(cache=True)
+def _record_order_nb(orders, n_orders, i, col, size, price):
+    orders[n_orders, 0] = i
+    orders[n_orders, 1] = col
+    orders[n_orders, 2] = size
+    orders[n_orders, 3] = price
+    return n_orders + 1
+
+
+@njit(cache=True)
+def rotate_portfolio_nb(price, entries, exits, cash, position):
+    """Simulates the rotation portfolio over a chunk of bars, continuing from the cash and positions left by the
+    previous chunk. Follows vectorbt's from_signals with cash sharing and call_seq='auto' for this strategy:
+    exits sell the whole position first, entries then buy with all the cash, orders at a missing price are skipped.
+    Parameters:
+    price: np.ndarray (Prices with shape (bars, symbols))
+    entries, exits: np.ndarray (Boolean signals with shape (bars, symbols))
+    cash: np.ndarray (Cash with shape (1,), updated in place)
+    position: np.ndarray (Shares held per symbol, updated in place)
+    Returns the portfolio value of every bar and the orders as (bar, symbol, size, price) rows, negative sizes sell."""
+
+    n_bars, n_cols = price.shape
+    value = np.empty(n_bars)
+    orders = np.empty((2 * n_bars, 4))
+    n_orders = 0
+
+    for i in range(n_bars):
+        for col in range(n_cols):                               # Sells first, their cash funds the buys of the same bar
+            if exits[i, col] and position[col] > 0 and not np.isnan(price[i, col]):
+                n_orders = _record_order_nb(orders, n_orders, i, col, -position[col], price[i, col])
+                cash[0] += position[col] * price[i, col]
+                position[col] = 0.
+        for col in range(n_cols):
+            if entries[i, col] and position[col] == 0 and cash[0] > 0 and not np.isnan(price[i, col]):
+                position[col] = cash[0] / price[i, col]
+                n_orders = _record_order_nb(orders, n_orders, i, col, position[col], price[i, col])
+                cash[0] = 0.
+
+        total = cash[0]
+        for col in range(n_cols):
+            if position[col] != 0:
+                total += position[col] * price[i, col]
+        value[i] = total
+
+    return value, orders[:n_orders]
+
+
+class ChunkedBacktest:
+    """Backtest of the strategy over chunks of bars. Indicators, the symbol in position and the portfolio are
+    carried from one chunk to the next, so the result does not depend on how the history is split. Like
+    friday.backtesting.bt_alpha the first max(windows) bars and the bars before start only warm the indicators up."""
+
+    def __init__(self,
+                 strategy: Strategy,
+                 init_cash: float = 10000,
+                 start: str = None) -> None:
+        """Initializes the state before the first bar.
+        Parameters:
+        strategy: friday.strategies.Strategy
+        init_cash: float = 10000
+        start: str = None (First bar traded, earlier bars only warm the indicators up. Format %Y-%m-%d)
+        Usage:
+            >>> backtest = ChunkedBacktest(Strategy(config))
+            >>> value = backtest.run(stream_bars(api, backtest.symbols, TimeFrame.Minute, '2020-01-01', '2022-10-07'))
+            >>> backtest.orders()"""
+
+        p = strategy.params
+        self.strategy = strategy
+        self.symbols = strategy.symbols
+        self.init_cash = init_cash
+        self.start = None if start is None else pd.Timestamp(start)
+        self.warmup = max(p['ma_fast'], p['ma_slow'], p['rsi_period'])     # Bars needed before the first valid signal
+        self.indicators = ChunkedIndicators(len(self.symbols), (p['ma_fast'], p['ma_slow']), p['rsi_period'])
+        self.last = np.full(len(self.symbols), np.nan)                       # Last close per symbol, carried into missing bars
+        self.in_trade = np.full(1, -1)
+        self.cash = np.full(1, float(init_cash))
+        self.position = np.zeros(len(self.symbols))
+        self.bars = 0
+        self.order_chunks = []
+
+    def update(self, close: pd.DataFrame) -> pd.Series:
+        """Advances the backtest over the next chunk of closes, bars missing for a symbol keep its last close.
+        Parameters:
+        close: pd.DataFrame (Closing prices with symbol tickers as columns, newer than the previous chunk)
+        Returns the portfolio value of the traded bars of the chunk."""
+
+        p = self.strategy.params
+        values = np.vstack([self.last[None], close[self.symbols].values.astype(np.float64)])
+        values = pd.DataFrame(values).ffill().values[1:]
+        self.last = values[-1].copy()
+
+        with profiler.stage('strategy.indicators', bars=len(values)):
+            ma, rsi = self.indicators.update(values)
+
+        first = max(self.warmup - self.bars, 0)                            # Warmup bars are dropped like in bt_alpha
+        if self.start is not None:
+            start = self.start.tz_localize(close.index.tz) if close.index.tz is not None else self.start
+            first = max(first, int(close.index.searchsorted(start)))
+        traded = slice(first, None)
+        self.bars += len(values)
+        values = values[traded]
+        if not len(values):
+            return pd.Series(dtype=np.float64, name='value')
+
+        with profiler.stage('strategy.signals', bars=len(values)):
+            targets = self.strategy.select_targets(values, ma[p['ma_fast']][traded], ma[p['ma_slow']][traded], rsi[traded])
+            entries, exits = rotate_signals_nb(np.asarray(targets, dtype=np.int64).reshape(-1, 1), len(self.symbols), self.in_trade)
+        profiler.count('bars_processed', targets.size)
+
+        with profiler.stage('portfolio.rotate', bars=len(values)):
+            value, orders = rotate_portfolio_nb(values, entries[:, 0], exits[:, 0], self.cash, self.position)
+
+        index = close.index[traded]
+        if len(orders):
+            self.order_chunks.append(pd.DataFrame({'timestamp': index[orders[:, 0].astype(np.int64)],
+                                                   'symbol': np.array(self.symbols)[orders[:, 1].astype(np.int64)],
+                                                   'size': orders[:, 2], 'price': orders[:, 3]}))
+
+        return pd.Series(value, index=index, name='value')
+
+    def run(self, chunks) -> pd.Series:
+        """Runs the backtest over an iterable of close chunks, see friday.data.stream.stream_bars().
+        Returns the portfolio value of every traded bar."""
+
+        return pd.concat([self.update(chunk) for chunk in chunks])
+
+    def orders(self) -> pd.DataFrame:
+        """Every filled order, negative sizes sell."""
+
+        if not self.order_chunks:
+            return pd.DataFrame(columns=['timestamp', 'symbol', 'size', 'price'])
+        return pd.concat(self.order_chunks, ignore_index=True)
+
+
+def warmup_start(start: str, interval: str, warmup: int) -> str:
+    """First session to stream so at least `warmup` bars of the interval precede start, counting regular hours only."""
+
+    amount, unit = int(interval[:-1]), interval[-1]
+    if unit in 'mh':
+        bars_per_session = max(390 // (amount * (60 if unit == 'h' else 1)), 1)     # 6.5 regular hours per session
+        sessions = -(-warmup // bars_per_session) + 1
+    else:
+        sessions = warmup * amount * {'d': 1, 'w': 5, 'M': 21}[unit]
+
+    return str(get_trading_calendar().previous_sessions(start, sessions)[0].date())
+
+
+def main(config=None, start='2020-01-01', end='2022-10-07', interval='1m', sessions=20):
+    """Backtests the strategy chunk by chunk and prints the portfolio statistics, see friday.cli for the command line.
+    Parameters:
+    config: dict = None (Configuration loaded from config.json, None reads config.json)
+    start: str = '2020-01-01' (Format %Y-%m-%d)
+    end: str = '2022-10-07' (Format %Y-%m-%d)
+    interval: str = '1m' (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)
+    sessions: int = 20 (Trading sessions per chunk)"""
+
+    if config is None:
+        with open(r'config.json') as config:
+            config = json.load(config)
+
+    backtest = ChunkedBacktest(Strategy(config), start=start)
+    chunks = stream_bars(make_source(config), backtest.symbols, timeframe(interval), warmup_start(start, interval, backtest.warmup), end,
+                         sessions=sessions, fetch=config.get('fetch'))
+    value = backtest.run(chunks)
+    orders = backtest.orders()
+
+    drawdown = 1 - value / value.cummax()
+    print(pd.Series({
+        'start': value.index[0],
+        'end': value.index[-1],
+        'bars': len(value),
+        'orders': len(orders),
+        'end_value': value.iloc[-1],
+        'total_return': value.iloc[-1] / backtest.init_cash - 1,
+        'max_drawdown': drawdown.max()
+    }, name='summary'))
+
+    os.makedirs('userdata', exist_ok=True)
+    orders.to_csv('userdata/intraday_orders.csv', index=False)
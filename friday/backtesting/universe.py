@@ -0,0 +1,135 @@
+"""
+Cross-sectional backtesting over a universe of symbols for Friday.
+
+Ranks the whole universe per bar with friday.strategies.UniverseStrategy and rebalances one cash sharing
+portfolio to the selected symbols, see the 'universe' entry of config.json.
+> python -m friday backtest --universe --start 2016-01-01 --end 2022-10-07
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import vectorbt as vbt
+from numba import njit
+
+from friday.backtesting.intraday import warmup_start
+from friday.data import BarCache, make_source, wide_frame
+from friday.profiling import profiler
+from friday.strategies import UniverseStrategy
+from friday.utils import timeframe
+
+
+@njit(cache=True)
+def rebalance_call_seq_nb(close, size, init_cash):
+    """Call sequence of every bar ordering the orders by their estimated value, sells first, the way call_seq='auto'
+    does but sorting only the symbols with an order instead of every symbol on every bar, whose cost grows with the
+    square of the universe. The estimated value of an order is the target percent of the portfolio value less the
+    value held, so the portfolio is followed bar by bar with the fills of from_orders (all at the close, buys
+    partially filled when the cash runs out). Symbols without orders keep their order at the end.
+    Parameters:
+    close: np.ndarray (Closing prices with shape (bars, symbols))
+    size: np.ndarray (Target percents, NaN places no order)
+    init_cash: float
+    Returns the column called at every position of every bar with shape (bars, symbols)."""
+
+    n_bars, n_cols = close.shape
+    call_seq = np.empty((n_bars, n_cols), dtype=np.int64)
+    cash = init_cash
+    position = np.zeros(n_cols)
+    ordered = np.empty(n_cols, dtype=np.int64)
+    order_value = np.empty(n_cols)
+
+    for i in range(n_bars):
+        n_orders = 0
+        for col in range(n_cols):
+            call_seq[i, col] = col
+            if not np.isnan(size[i, col]):
+                ordered[n_orders] = col
+                n_orders += 1
+        if n_orders == 0:
+            continue
+
+        value = cash
+        for col in range(n_cols):
+            if position[col] != 0:
+                value += position[col] * close[i, col]
+        for x in range(n_orders):
+            col = ordered[x]
+            order_value[x] = size[i, col] * value - position[col] * close[i, col]
+        order = np.argsort(order_value[:n_orders], kind='mergesort')
+
+        pos = 0
+        for x in order:
+            col = ordered[x]
+            call_seq[i, pos] = col
+            pos += 1
+            price = close[i, col]
+            if np.isnan(price):
+                continue
+            shares = size[i, col] * value / price - position[col]
+            if shares > 0:
+                shares = min(shares, cash / price)
+            position[col] += shares
+            cash -= shares * price
+        for col in range(n_cols):
+            if np.isnan(size[i, col]):
+                call_seq[i, pos] = col
+                pos += 1
+
+    return call_seq
+
+
+def simulate_universe(close, size, init_cash: float = 10000):
+    """Runs the universe as one vectorbt Portfolio sharing its cash across every symbol.
+    Orders fill at the close, sells before buys (see rebalance_call_seq_nb()), and bring every symbol to its target
+    percent of the portfolio value.
+    Parameters:
+    close: pd.DataFrame (Closing prices with symbol tickers as columns)
+    size: pd.DataFrame (Target percents aligned with close, NaN places no order. See UniverseStrategy.strategy())
+    init_cash: float = 10000"""
+
+    return vbt.Portfolio.from_orders(
+        close=close,
+        size=size,
+        size_type='targetpercent',
+        price=close,
+        cash_sharing=True,
+        slippage=0.0,       # set slippage
+        init_cash=init_cash,
+        group_by=True,
+        call_seq=rebalance_call_seq_nb(np.ascontiguousarray(close.values, dtype=np.float64), np.ascontiguousarray(size.values), float(init_cash)),
+        freq='d')
+
+
+def main(config=None, start='2016-01-01', end='2022-10-07'):
+    """Backtests the universe strategy and prints the portfolio statistics, see friday.cli for the command line.
+    Parameters:
+    config: dict = None (Configuration loaded from config.json, None reads config.json)
+    start: str = '2016-01-01' (Format %Y-%m-%d)
+    end: str = '2022-10-07' (Format %Y-%m-%d)"""
+
+    if config is None:
+        with open(r'config.json') as config:
+            config = json.load(config)
+
+    strategy = UniverseStrategy(config)
+    cache = BarCache(make_source(config), fetch=config.get('fetch'), **config.get('cache', {}))
+    bars = cache.get_many(strategy.symbols, timeframe('1d'), start=warmup_start(start, '1d', strategy.warmup), end=end, adjustment='split')
+    close = wide_frame(bars, 'close', strategy.symbols).ffill()          # Missing bars keep the last close, unlisted symbols stay NaN
+
+    first = pd.Timestamp(start).tz_localize(close.index.tz) if close.index.tz is not None else pd.Timestamp(start)
+    close, size = strategy.strategy(close, days=int((close.index >= first).sum()))
+
+    with profiler.stage('portfolio.from_orders', symbols=len(strategy.symbols)):
+        pf = simulate_universe(close, size)
+
+    os.makedirs('userdata', exist_ok=True)
+    pf.orders.records_readable.to_csv('userdata/universe_orders.csv')
+    print(pf.stats())
+    print(pf.returns_stats(group_by=True))
+
+
+if __name__ == '__main__':
+    main()
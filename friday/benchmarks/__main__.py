@@ -0,0 +1,77 @@
+"""
+__main__.py for the Friday benchmarks
+
+Runs the benchmark suite offline against fixture prices and saves the results as JSON.
+> python -m friday.benchmarks --output userdata/benchmarks.json
+> python -m friday.benchmarks --quick --compare userdata/benchmarks.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from .suite import run
+
+
+def _version() -> str:
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _key(result) -> tuple:
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline, threshold: float) -> list:
+    """Returns the benchmarks whose median got slower than threshold times the baseline median."""
+
+    previous = {_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        if (old := previous.get(_key(result))) and result['median'] > old['median'] * threshold:
+            regressions.append((result['name'], result['params'], old['median'], result['median']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m friday.benchmarks', description='Friday benchmark suite.')
+    parser.add_argument('--output', default='userdata/benchmarks.json', help='JSON file the results are written to.')
+    parser.add_argument('--quick', action='store_true', help='Run the reduced parameter grid.')
+    parser.add_argument('--compare', help='JSON results of a previous run to check for regressions.')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression.')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:                                    # Read before the output is written, both may be the same file
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = {
+        'version': _version(),
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': run(quick=args.quick)
+    }
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    if baseline is not None:
+        regressions = compare(report['results'], baseline, args.threshold)
+        for name, params, old, new in regressions:
+            print(f"REGRESSION {name} {params}: {old * 1e3:.3f} ms -> {new * 1e3:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
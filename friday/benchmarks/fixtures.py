@@ -0,0 +1,56 @@
+"""Offline fixture data for the Friday benchmarks."""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from friday.data import Bars, DataSource
+from friday.utils import get_active_dates
+
+# Symbols the strategy decision tree refers to, additional symbols are appended to scale the universe
+SYMBOLS = ['SPY', 'TQQQ', 'SPXL', 'UVXY', 'SQQQ', 'BSV', 'TECL']
+
+
+def fixture_symbols(n_symbols: int = 7) -> list:
+    """Returns the strategy symbols padded with generic tickers up to n_symbols."""
+
+    return SYMBOLS[:n_symbols] + [f"SYM{x}" for x in range(n_symbols - len(SYMBOLS))]
+
+
+def fixture_close(n_bars: int = 1000,
+                  n_symbols: int = 7,
+                  seed: int = 0) -> pd.DataFrame:
+    """Deterministic geometric random walk closing prices ending on the last session before today.
+    Parameters:
+    n_bars: int = 1000 (History length in sessions)
+    n_symbols: int = 7
+    seed: int = 0"""
+
+    today = datetime.now(pytz.timezone('US/Eastern')).date()
+    sessions = get_active_dates('2000-01-01', str(today))
+    sessions = sessions[sessions.date < today][-n_bars:]
+
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.03, (len(sessions), n_symbols))
+    close = 100 * np.cumprod(1 + returns, axis=0)
+
+    return pd.DataFrame(close, index=sessions + pd.Timedelta(hours=4), columns=fixture_symbols(n_symbols))
+
+
+class FixtureAPI(DataSource):
+    """Offline data source serving bars built from fixture_close()."""
+
+    def __init__(self, close: pd.DataFrame) -> None:
+        self.close = close
+
+    def get_bars(self, symbol, timeframe, start=None, end=None, adjustment='raw', limit=None):
+        close = self.close[symbol]
+        if start is not None:
+            close = close[close.index.normalize() >= pd.Timestamp(start, tz='UTC')]
+        if end is not None:
+            close = close[close.index.normalize() <= pd.Timestamp(end, tz='UTC')]
+        df = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1e6})
+        df.index.name = 'timestamp'
+        return Bars(df)
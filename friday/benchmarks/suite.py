@@ -0,0 +1,156 @@
+"""Benchmarks of the data, strategy and portfolio hot paths of Friday."""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from friday.data import Synthesizer
+from friday.simulation import RiskMetrics, simulate_portfolio
+from friday.strategies import Strategy, generate_signals
+from friday.utils import (get_active_dates, get_future_dates,
+                          get_simulation_end_date, get_trading_calendar)
+
+from .fixtures import FixtureAPI, fixture_close, fixture_symbols
+
+# Parameter grids, the quick grid is used for smoke runs
+GRID = {
+    'bars': [500, 2000, 5000],
+    'symbols': [7, 50, 200],
+    'paths': [1, 100, 1000]
+}
+QUICK_GRID = {
+    'bars': [500],
+    'symbols': [7],
+    'paths': [1, 100]
+}
+
+
+def measure(func, repeat: int = 5, number: int = 1) -> dict:
+    """Times func after one warm-up call (numba compilation, caches) and returns the timings in seconds per call."""
+
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+
+    return {'min': min(times), 'median': float(np.median(times)), 'mean': float(np.mean(times)), 'repeat': repeat, 'number': number}
+
+
+@contextmanager
+def _synthesizer(bars, symbols):
+    """Synthesizer over fixture prices with its bar cache and price store in a temporary directory removed on exit."""
+
+    close = fixture_close(bars, symbols)
+    today = datetime.now(pytz.timezone('US/Eastern')).date()
+    simulation_start = str(get_trading_calendar().next_sessions(today, 2)[-1].date())
+
+    with tempfile.TemporaryDirectory(prefix='friday_bench_') as path:
+        config = {'assets': {'symbols': fixture_symbols(symbols)}, 'cache': {'path': path}, 'store': {'path': os.path.join(path, 'store')}}
+        yield Synthesizer(start=str(close.index[0].date()),
+                          end=str(close.index[-2].date()),
+                          simulation_start=simulation_start,
+                          days=15,
+                          api=FixtureAPI(close),
+                          config=config), config
+
+
+def bench_synthetic_data(bars, symbols, paths):
+    with _synthesizer(bars, symbols) as (s, _):
+        return measure(lambda: s.synthetic_data(paths=paths))
+
+
+def bench_strategy(bars, symbols):
+    close = fixture_close(bars, symbols)
+    strategy = Strategy({'assets': {'symbols': fixture_symbols(symbols)}})
+    return measure(lambda: strategy.strategy(close, 252))
+
+
+def bench_strategy_paths(bars, symbols, paths):
+    with _synthesizer(bars, symbols) as (s, config):
+        close = s.close_history()
+    future_index = get_future_dates(s.start, s.simulation_end)
+    future = s.project(close, len(future_index), paths, rng=0)
+    strategy = Strategy(config)
+    return measure(lambda: strategy.strategy_paths(close, future, future_index, s.days))
+
+
+def bench_signal_generator(bars, symbols, paths):
+    targets = np.random.default_rng(0).integers(0, symbols, (bars, paths))
+    return measure(lambda: generate_signals(targets, symbols), number=10)
+
+
+def bench_calendar():
+    results = {}
+    results['get_active_dates'] = measure(lambda: get_active_dates('2016-01-01', '2022-10-07'), number=100)
+    results['get_simulation_end_date'] = measure(lambda: get_simulation_end_date('2022-10-17', 15), number=100)
+    results['get_future_dates'] = measure(lambda: get_future_dates('2022-06-17', '2030-01-01'), number=100)
+    return results
+
+
+def bench_portfolio(bars, symbols, paths):
+    with _synthesizer(bars, symbols) as (s, config):
+        close = s.close_history()
+    future_index = get_future_dates(s.start, s.simulation_end)
+    future = s.project(close, len(future_index), paths, rng=0)
+    data, entries, exits = Strategy(config).strategy_paths(close, future, future_index, s.days)
+    return measure(lambda: simulate_portfolio(data, entries, exits), repeat=3)
+
+
+def bench_risk_metrics(bars, paths):
+    cum_returns = pd.DataFrame(np.cumprod(1 + np.random.default_rng(0).normal(0.0005, 0.02, (bars, paths)), axis=0) - 1)
+
+    def summarize():
+        risk = RiskMetrics()
+        risk.update(cum_returns)
+        return risk.summary()
+
+    return measure(summarize)
+
+
+def run(quick: bool = False, log=print) -> list:
+    """Runs every benchmark over the parameter grid.
+    Returns a list of results with the benchmark name, its parameters and timings."""
+
+    grid = QUICK_GRID if quick else GRID
+    bars, symbols, paths = grid['bars'], grid['symbols'], grid['paths']
+    cases = []
+
+    # History length and symbol count scale the single path stages, the number of paths scales the batched stages
+    for n in bars:
+        cases.append(('strategy', {'bars': n, 'symbols': 7}, lambda n=n: bench_strategy(n, 7)))
+        cases.append(('signal_generator', {'bars': n, 'symbols': 7, 'paths': 1}, lambda n=n: bench_signal_generator(n, 7, 1)))
+        cases.append(('synthetic_data', {'bars': n, 'symbols': 7, 'paths': 1}, lambda n=n: bench_synthetic_data(n, 7, 1)))
+    for k in symbols:
+        cases.append(('synthetic_data', {'bars': bars[0], 'symbols': k, 'paths': 1}, lambda k=k: bench_synthetic_data(bars[0], k, 1)))
+        cases.append(('strategy', {'bars': bars[0], 'symbols': k}, lambda k=k: bench_strategy(bars[0], k)))
+    for p in paths:
+        cases.append(('synthetic_data', {'bars': bars[0], 'symbols': 7, 'paths': p}, lambda p=p: bench_synthetic_data(bars[0], 7, p)))
+        cases.append(('strategy_paths', {'bars': bars[0], 'symbols': 7, 'paths': p}, lambda p=p: bench_strategy_paths(bars[0], 7, p)))
+        cases.append(('signal_generator', {'bars': 252, 'symbols': 7, 'paths': p}, lambda p=p: bench_signal_generator(252, 7, p)))
+        cases.append(('portfolio', {'bars': bars[0], 'symbols': 7, 'paths': p}, lambda p=p: bench_portfolio(bars[0], 7, p)))
+        cases.append(('risk_metrics', {'bars': 252, 'paths': p}, lambda p=p: bench_risk_metrics(252, p)))
+
+    results = []
+    seen = set()
+    for name, params, func in cases:
+        if (name, str(params)) in seen:                 # Grids share their first value, every case runs once
+            continue
+        seen.add((name, str(params)))
+        timings = func()
+        results.append({'name': name, 'params': params, **timings})
+        log(f"{name:<24} {str(params):<45} median {timings['median'] * 1e3:10.3f} ms")
+
+    for name, timings in bench_calendar().items():
+        results.append({'name': name, 'params': {}, **timings})
+        log(f"{name:<24} {'{}':<45} median {timings['median'] * 1e3:10.3f} ms")
+
+    return results
@@ -0,0 +1,205 @@
+"""
+Command line interface for Friday.
+
+Subcommands import their dependencies when they run, so `--help`, argument errors and short scheduled
+jobs do not pay for loading vectorbt, plotly or the Alpaca client up front.
+> python -m friday simulate --paths 1000 --workers 4
+> python -m friday backtest --start 2016-01-01 --end 2022-10-07
+> python -m friday backtest --interval 1m --start 2020-01-01 --sessions 20
+> python -m friday backtest --universe --start 2016-01-01
+> python -m friday fetch --start 2016-01-01
+> python -m friday sweep --start 2016-01-01 --grid ma_slow=150,200,250 --grid tqqq_overbought=75:85
+> python -m friday --timing simulate
+> python -m friday --profile --capture portfolio.from_signals simulate
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from friday.profiling import profiler
+
+_start = time.perf_counter()
+_stages = []                                                            # (stage, seconds) measured by _mark()
+
+
+def _mark(stage: str) -> None:
+    """Records the time spent since the previous mark under the given stage name."""
+
+    now = time.perf_counter()
+    _stages.append((stage, now - _start - sum(seconds for _, seconds in _stages)))
+
+
+def _report() -> None:
+    total = sum(seconds for _, seconds in _stages)
+    stages = ' | '.join(f'{stage} {seconds:.3f} s' for stage, seconds in _stages)
+    print(f'timing: {stages} | total {total:.3f} s', file=sys.stderr)
+
+
+def _grid(values) -> dict:
+    """Parses --grid entries, 'name=1,2,3' lists the values and 'name=start:stop[:step]' is a range with an exclusive stop."""
+
+    grid = {}
+    for value in values:
+        name, _, spec = value.partition('=')
+        if not spec:
+            raise ValueError(f"Invalid grid entry '{value}', use name=1,2,3 or name=start:stop[:step].")
+        number = float if '.' in spec else int
+        if ':' in spec:
+            bounds = [number(x) for x in spec.split(':')]
+            step = bounds[2] if len(bounds) > 2 else 1
+            grid[name] = [bounds[0] + x * step for x in range(int(-(-(bounds[1] - bounds[0]) // step)))]
+        else:
+            grid[name] = [number(x) for x in spec.split(',')]
+
+    return grid
+
+
+def simulate(args, config) -> None:
+    from friday import main
+    _mark('imports')
+
+    main.main(config, paths=args.paths, batch=not args.loop, workers=args.workers, seed=args.seed,
+              sample=args.sample, curves=args.curves, start=args.start, end=args.end,
+              simulation_start=args.simulation_start, days=args.days, show=not args.no_show)
+
+
+def backtest(args, config) -> None:
+    if args.universe:                                                   # Cross-sectional ranking of config['universe']
+        from friday.backtesting import universe
+        _mark('imports')
+        universe.main(config, start=args.start, end=args.end)
+        return
+
+    if args.interval != '1d' or args.sessions:                         # Intraday bars are streamed chunk by chunk
+        from friday.backtesting import intraday
+        _mark('imports')
+        intraday.main(config, start=args.start, end=args.end, interval=args.interval, sessions=args.sessions or 20)
+        return
+
+    from friday.backtesting import bt_alpha
+    _mark('imports')
+
+    bt_alpha.main(config, start=args.start, end=args.end, show=not args.no_show)
+
+
+def fetch(args, config) -> None:
+    from friday.data import BarCache, make_source
+    from friday.utils import timeframe
+    _mark('imports')
+
+    symbols = args.symbols or config['assets']['symbols']
+    cache = BarCache(make_source(config), fetch=config.get('fetch'), **config.get('cache', {}))
+    bars = cache.get_many(symbols, timeframe(args.interval), start=args.start, end=args.end, adjustment=args.adjustment)
+    for symbol in symbols:
+        frame = bars[symbol]
+        print(f'{symbol}: {len(frame)} bars' + (f' from {frame.index[0]} to {frame.index[-1]}' if len(frame) else ''))
+
+
+def sweep(args, config) -> None:
+    import pandas as pd
+
+    from friday.data import BarCache, make_source, wide_frame
+    from friday.optimization import ParameterSweep, WalkForward
+    from friday.strategies import Strategy
+    from friday.utils import timeframe
+    _mark('imports')
+
+    strategy = Strategy(config)
+    grid = _grid(args.grid) if args.grid else config.get('sweep', {}).get('grid', {})
+    cache = BarCache(make_source(config), fetch=config.get('fetch'), **config.get('cache', {}))
+    bars = cache.get_many(strategy.symbols, timeframe('1d'), start=args.start, end=args.end)
+    close = wide_frame(bars, 'close', strategy.symbols)
+
+    optimizer = ParameterSweep(strategy, grid, metric=args.metric)
+    if args.walk_forward:
+        optimizer = WalkForward(optimizer, in_sample=args.in_sample, out_of_sample=args.out_of_sample, workers=args.workers)
+    table = optimizer.run(close)
+
+    if args.output:
+        table.to_csv(args.output)
+    with pd.option_context('display.max_columns', None, 'display.width', None):
+        print(table if args.walk_forward else table.head(args.top))
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m friday', description='Friday backtesting and future simulations.')
+    parser.add_argument('--config', default='config.json', help='Configuration file.')
+    parser.add_argument('--timing', action='store_true', help='Report the startup, import and run time on stderr.')
+    parser.add_argument('--profile', action='store_true', help="Write a Chrome trace of the run's stages and counters, see friday.profiling.")
+    parser.add_argument('--capture', help='Stage profiled with cProfile, e.g. portfolio.from_signals. Implies --profile.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    command = commands.add_parser('simulate', help='Run future simulations of the strategy (default).')
+    command.add_argument('--paths', type=int, default=5, help='Number of future simulations.')
+    command.add_argument('--loop', action='store_true', help='Run one portfolio per simulation instead of one batch.')
+    command.add_argument('--workers', type=int, help='Worker processes running the simulations, none keeps them in this process.')
+    command.add_argument('--seed', type=int, help='Master seed of the worker processes, the same seed reproduces the simulations.')
+    command.add_argument('--sample', type=int, default=5, help='Simulation curves highlighted in the charts.')
+    command.add_argument('--curves', help='Directory every simulation curve is written to.')
+    command.add_argument('--start', default='2022-06-17', help='Start of the window the synthetic data is drawn from.')
+    command.add_argument('--end', default='2022-08-17', help='End of the window the synthetic data is drawn from.')
+    command.add_argument('--simulation-start', default='2022-10-17', help='First simulated session, past dates use real data.')
+    command.add_argument('--days', type=int, default=15, help='Number of simulated sessions.')
+    command.add_argument('--no-show', action='store_true', help='Only write the charts to html.')
+    command.set_defaults(handler=simulate)
+
+    command = commands.add_parser('backtest', help='Backtest the strategy on historical bars.')
+    command.add_argument('--start', default='2016-01-01')
+    command.add_argument('--end', default='2022-10-07')
+    command.add_argument('--no-show', action='store_true', help='Skip the order plot.')
+    command.add_argument('--interval', default='1d', help="Trading interval, e.g. '1m', '45m', '1h', '1d'. Other than 1d runs the chunked backtest.")
+    command.add_argument('--sessions', type=int, help='Trading sessions per chunk, runs the chunked backtest also for 1d (20 by default).')
+    command.add_argument('--universe', action='store_true', help="Rank and rotate across the 'universe' entry of the configuration.")
+    command.set_defaults(handler=backtest)
+
+    command = commands.add_parser('fetch', help='Fill the bar cache without running anything.')
+    command.add_argument('--start', required=True)
+    command.add_argument('--end', help='Defaults to today.')
+    command.add_argument('--symbols', nargs='+', help='Defaults to the symbols of the configuration.')
+    command.add_argument('--interval', default='1d', help="Trading interval, e.g. '1m', '45m', '1h', '1d'.")
+    command.add_argument('--adjustment', default='split')
+    command.set_defaults(handler=fetch)
+
+    command = commands.add_parser('sweep', help='Grid search the strategy parameters, optionally walk-forward.')
+    command.add_argument('--start', default='2016-01-01')
+    command.add_argument('--end')
+    command.add_argument('--grid', action='append', help="Parameter values, 'name=1,2,3' or 'name=start:stop[:step]'. Defaults to the 'sweep' entry of the configuration.")
+    command.add_argument('--metric', default='sharpe_ratio', help='Metric the combinations are ranked by.')
+    command.add_argument('--top', type=int, default=20, help='Best combinations printed.')
+    command.add_argument('--output', help='CSV file the full table is written to.')
+    command.add_argument('--walk-forward', action='store_true', help='Tune on rolling in-sample windows and score out of sample.')
+    command.add_argument('--in-sample', type=int, default=504)
+    command.add_argument('--out-of-sample', type=int, default=126)
+    command.add_argument('--workers', type=int, help='Worker processes of the walk-forward.')
+    command.set_defaults(handler=sweep)
+
+    return parser
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser().parse_args(argv)
+    if args.command is None:                                            # `python -m friday` keeps running the simulations
+        args = parser().parse_args([*argv, 'simulate'])
+
+    with open(args.config) as config:
+        config = json.load(config)
+    settings = {**config.get('profile', {}), **({'enabled': True} if args.profile or args.capture else {}),
+                **({'capture': args.capture} if args.capture else {})}
+    profiler.configure(**{'enabled': False, **settings})               # 'profile' entry of config.json, overridden by the flags
+    _mark('startup')
+
+    with profiler.stage(f'cli.{args.command}'):
+        args.handler(args, config)
+    _mark('run')
+
+    if args.timing:
+        _report()
+    if profiler.enabled:
+        print(f'profile: {profiler.write()}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,10 @@
 from .base import Base
+from .cache import BarCache
 from .fetcher import Fetcher
-from .synthesizer import Synthesizer
\ No newline at end of file
+from .paths import PathSet
+from .pipeline import FetchPipeline, RateLimiter, wide_frame
+from .sources import (AlpacaSource, Bars, DataSource, ReplaySource,
+                      make_source)
+from .store import PriceStore
+from .synthesizer import (Synthesizer, growth_matrix, project_prices,
+                          stack_paths)
\ No newline at end of file
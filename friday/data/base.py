@@ -1,6 +1,8 @@
 from friday.utils import (get_processed_dates, get_simulation_end_date,
                           timeframe)
 
+from .cache import BarCache
+
 
 class Base:
     """Base class for data functionality for Friday."""
@@ -18,11 +20,12 @@ class Base:
         Parameters
         start: str (Format %Y-%m-%d)
         end: str (Format %Y-%m-%d)
-        api: Alpaca REST API.
-        config: Configuration file for various predefined data attributes.
+        api: Data source serving get_bars(), the Alpaca REST API or any friday.data.sources.DataSource.
+        config: Configuration file for various predefined data attributes. (Optional 'cache' and 'fetch' entries hold the BarCache and FetchPipeline parameters)
         interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)"""
 
         self.api = api
+        self.cache = BarCache(api, fetch=config.get('fetch'), **config.get('cache', {}))  # Bars are fetched through a persistent cache. See friday.data.cache
         self.config = config
         self.start = start
         self.end = end
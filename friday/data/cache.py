@@ -0,0 +1,180 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+
+from .pipeline import FetchPipeline
+
+
+class BarCache:
+    """Persistent bar cache for Friday. Sits in front of the Alpaca REST API and stores the bars per
+    (symbol, timeframe, adjustment) in a columnar file, only the missing date ranges are fetched from the api."""
+
+    def __init__(self,
+                 api,
+                 path: str = 'userdata/bars',
+                 file_format: str = 'parquet',
+                 fetch: dict = None) -> None:
+        """Initializes the cache.
+        Parameters:
+        api: Alpaca REST API.
+        path: str = 'userdata/bars' (Directory holding the cached bars)
+        file_format: str = 'parquet' (Columnar on-disk format, 'parquet' or 'feather')
+        fetch: dict = None (FetchPipeline parameters, see friday.data.pipeline)
+        Usage:
+            >>> cache = BarCache(api)
+            >>> cache.get_bars('SPY', TimeFrame.Day, start='2022-01-01', end='2022-06-30')
+            >>> cache.get_many(['SPY', 'TQQQ'], TimeFrame.Day, start='2022-01-01', end='2022-06-30')
+            >>> cache.invalidate('SPY')"""
+
+        if file_format not in ('parquet', 'feather'):
+            raise ValueError(f"Unsupported file format '{file_format}', use 'parquet' or 'feather'.")
+
+        self.api = api
+        self.pipeline = FetchPipeline(api, **(fetch or {}))              # Missing ranges are fetched concurrently
+        self.path = path
+        self.file_format = file_format
+        self.frames = {}                                                # In-memory bars per key
+        self.coverage = self._read_coverage()                           # Requested date range stored per key
+        self.fetched_end = {}                                           # Last date fetched per key by this process
+
+    def _key(self, symbol, timeframe, adjustment) -> str:
+        return f"{symbol}_{timeframe}_{adjustment}"
+
+    def _file(self, key) -> str:
+        return os.path.join(self.path, f"{key}.{self.file_format}")
+
+    def _read_coverage(self) -> dict:
+        index = os.path.join(self.path, 'index.json')
+        if os.path.exists(index):
+            with open(index) as f:
+                return json.load(f)
+        return {}
+
+    def _write_coverage(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'index.json'), 'w') as f:
+            json.dump(self.coverage, f, indent=4)
+
+    def _load(self, key) -> pd.DataFrame:
+        """Returns the bars of a key from memory, reading them from disk the first time."""
+
+        if key not in self.frames:
+            file = self._file(key)
+            if key in self.coverage and os.path.exists(file):
+                bars = pd.read_parquet(file) if self.file_format == 'parquet' else pd.read_feather(file)
+                self.frames[key] = bars.set_index('timestamp')
+            else:
+                self.coverage.pop(key, None)
+                self.frames[key] = None
+
+        return self.frames[key]
+
+    def _store(self, key, bars) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        file = self._file(key)
+        if self.file_format == 'parquet':
+            bars.reset_index().to_parquet(file)
+        else:
+            bars.reset_index().to_feather(file)
+        self.frames[key] = bars
+
+    def get_bars(self,
+                 symbol: str,
+                 timeframe,
+                 start: str,
+                 end: str = None,
+                 adjustment: str = 'split',
+                 limit: int = 10000) -> pd.DataFrame:
+        """Returns the bars of a symbol between start and end, fetching only the date ranges not cached yet.
+        Parameters:
+        symbol: str
+        timeframe: Alpaca TimeFrame object (See friday.utils.trading_)
+        start: str (Format %Y-%m-%d)
+        end: str = None (Format %Y-%m-%d, None fetches till the current date)
+        adjustment: str = 'split'
+        limit: int = 10000 (Maximum bars per api request)"""
+
+        return self.get_many([symbol], timeframe, start, end, adjustment, limit)[symbol]
+
+    def get_many(self,
+                 symbols: list,
+                 timeframe,
+                 start: str,
+                 end: str = None,
+                 adjustment: str = 'split',
+                 limit: int = 10000) -> dict:
+        """Returns the bars of many symbols between start and end. The date ranges missing from the cache are
+        fetched for all symbols at once through the concurrent fetch pipeline, see friday.data.pipeline.
+        Parameters: See get_bars()
+        Returns a dict with the bars per symbol."""
+
+        today = datetime.now(pytz.timezone('US/Eastern')).date()
+        end = end if end is not None else str(today)
+        # The current session can still change, it is never marked as covered so later calls refresh it
+        covered_end = min(end, str(today - timedelta(1)))
+
+        requests = []
+        for symbol in symbols:
+            key = self._key(symbol, timeframe, adjustment)
+            if self._load(key) is None:
+                requests.append((symbol, start, end))
+            else:
+                cached_start, cached_end = self.coverage[key]
+                fetched_end = max(cached_end, self.fetched_end.get(key, cached_end))
+                if start < cached_start:
+                    requests.append((symbol, start, cached_start))
+                if end > fetched_end:
+                    requests.append((symbol, cached_end, end))
+
+        fetched = {}
+        for (symbol, *_), bars in zip(requests, self.pipeline.fetch(requests, timeframe, adjustment, limit)):
+            fetched.setdefault(symbol, []).append(bars)
+
+        for symbol, missing in fetched.items():
+            key = self._key(symbol, timeframe, adjustment)
+            bars = self.frames[key]
+            if bars is None:
+                bars = missing[0]
+                self.coverage[key] = [start, covered_end]
+            else:
+                cached_start, cached_end = self.coverage[key]
+                bars = pd.concat([bars, *missing])
+                bars = bars[~bars.index.duplicated(keep='last')].sort_index()   # Ranges overlap on their boundaries
+                self.coverage[key] = [min(start, cached_start), max(covered_end, cached_end)]
+            self.fetched_end[key] = max(end, self.fetched_end.get(key, end))
+            self._store(key, bars)
+
+        if fetched:
+            self._write_coverage()
+
+        return {symbol: self._select(self.frames[self._key(symbol, timeframe, adjustment)], start, end) for symbol in symbols}
+
+    def _select(self, bars, start, end) -> pd.DataFrame:
+        dates = bars.index.tz_convert(None).normalize() if bars.index.tz is not None else bars.index.normalize()
+        return bars[(dates >= start) & (dates <= end)]
+
+    def invalidate(self,
+                   symbol: str = None,
+                   timeframe=None,
+                   adjustment: str = None) -> None:
+        """Drops cached bars from memory and disk. Arguments left as None match every key.
+        Parameters:
+        symbol: str = None
+        timeframe: Alpaca TimeFrame object = None
+        adjustment: str = None"""
+
+        for key in set(self.coverage) | set(self.frames):
+            _symbol, _timeframe, _adjustment = key.rsplit('_', 2)
+            if ((symbol is None or _symbol == symbol)
+                    and (timeframe is None or _timeframe == str(timeframe))
+                    and (adjustment is None or _adjustment == adjustment)):
+                self.coverage.pop(key, None)
+                self.frames.pop(key, None)
+                self.fetched_end.pop(key, None)
+                if os.path.exists(self._file(key)):
+                    os.remove(self._file(key))
+
+        self._write_coverage()
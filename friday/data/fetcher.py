@@ -1,7 +1,8 @@
 from time import time
 
-import pandas as pd
+from friday.profiling import profiled
 
+from .pipeline import wide_frame
 from .synthesizer import Synthesizer
 
 
@@ -41,6 +42,7 @@ class Fetcher(Synthesizer):
 
         super().__init__(start, end, simulation_start, days, api, config, interval) # super() functions enables the parent class functionality inside the child class
 
+    @profiled('data.historical_data')
     def historical_data(self,
                         adjustment: str = 'split',
                         max_limit: int = 10000,
@@ -50,7 +52,7 @@ class Fetcher(Synthesizer):
         """Historical data function downloads the historical data till the specified date, has an optional functionality to call synthetic_data() from within this function.
         Parameters:
         adjustment: str = 'split'
-        max_limit: int = 10000 (DataFrame values to be fetched, cannot exceed 10000)
+        max_limit: int = 10000 (Maximum bars per api request, longer ranges are paginated)
         project_future: bool = False (True will call the synthetic_data() functionality for future data. See friday.data.synthesizer)
         write_to_csv: bool = False. (True will generate a csv file with the closing prices from historical data till the projected date."""
 
@@ -60,17 +62,13 @@ class Fetcher(Synthesizer):
                                         write_to_csv=write_to_csv)
             
         else: # Else uses alpaca api to get close data for each symbol.
-            close = pd.DataFrame(columns=self.symbols) # Empty dataframe with symbol tickers as columns
-            alpaca_data = self.api.get_bars(self.symbols,
-                                            self.trading_timeframe, 
-                                            start=self.start,
-                                            end=self.end, 
-                                            adjustment=adjustment, 
-                                            limit=max_limit).df.get(['close', 'symbol']) # Get data from alpaca api
-            grouped_data = alpaca_data.groupby('symbol')
-
-            for symbol in self.symbols:
-                close[symbol] = grouped_data.get_group(symbol)['close']
+            bars = self.cache.get_many(self.symbols,
+                                       self.trading_timeframe,
+                                       start=self.start,
+                                       end=self.end,
+                                       adjustment=adjustment,
+                                       limit=max_limit) # Get data from the cache, symbols and pages are fetched concurrently
+            close = wide_frame(bars, 'close', self.symbols) # Aligned dataframe with symbol tickers as columns
 
         if write_to_csv:
             close.to_csv(f"close_data.csv") # Optional parameter to write in CSV
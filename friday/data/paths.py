@@ -0,0 +1,119 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class PathSet:
+    """Compact container of simulated paths for Friday. Keeps the prices of every path and symbol in one
+    (bars, paths, symbols) array, float32 by default, next to a single session index shared by every path and
+    boolean entry and exit arrays of the same shape. Frames with (path, symbol) columns are built on demand as
+    views for vectorbt, so no per-path objects or Python lists are kept."""
+
+    def __init__(self,
+                 index,
+                 symbols: list,
+                 prices: np.ndarray,
+                 entries: np.ndarray = None,
+                 exits: np.ndarray = None,
+                 path_ids=None,
+                 dtype=np.float32) -> None:
+        """Initializes the container, the arrays are kept without copies when they already have the right dtype.
+        Parameters:
+        index: pd.DatetimeIndex or list (Session of every bar, shared by every path)
+        symbols: list (Symbol tickers, the last axis of the arrays)
+        prices: np.ndarray (Prices with shape (bars, paths, symbols))
+        entries, exits: np.ndarray = None (Boolean signals with the shape of prices, None keeps no signals)
+        path_ids: Iterable = None (Label of every path, defaults to 0 ... paths-1)
+        dtype: np.dtype = np.float32 (Price dtype, float32 halves the memory of float64 at about 7 significant digits)
+        Usage:
+            >>> paths = strategy.signal_paths(close, future, future_index, days)
+            >>> paths.nbytes / paths.paths
+            630.0
+            >>> data, entries, exits = paths.frames()
+            >>> paths.symbol('SPY')"""
+
+        self.index = pd.DatetimeIndex(index)
+        self.symbols = list(symbols)
+        self.prices = np.asarray(prices, dtype=dtype)
+        self.entries = None if entries is None else np.asarray(entries, dtype=np.bool_)
+        self.exits = None if exits is None else np.asarray(exits, dtype=np.bool_)
+        self.path_ids = pd.Index(range(self.prices.shape[1]) if path_ids is None else path_ids, name='path')
+
+        if self.prices.shape != (len(self.index), len(self.path_ids), len(self.symbols)):
+            raise ValueError(f"Prices of shape {self.prices.shape} do not match {len(self.index)} bars, "
+                             f"{len(self.path_ids)} paths and {len(self.symbols)} symbols.")
+
+    @property
+    def paths(self) -> int:
+        return self.prices.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, the index is shared and not counted."""
+
+        return sum(array.nbytes for array in (self.prices, self.entries, self.exits) if array is not None)
+
+    def columns(self) -> pd.MultiIndex:
+        return pd.MultiIndex.from_product([self.path_ids, self.symbols], names=['path', 'symbol'])
+
+    def frame(self, values: np.ndarray, columns: pd.MultiIndex = None) -> pd.DataFrame:
+        """Wraps a (bars, paths, symbols) array into a DataFrame with (path, symbol) columns, without copying."""
+
+        columns = self.columns() if columns is None else columns
+        return pd.DataFrame(values.reshape(len(self.index), -1), index=self.index, columns=columns, copy=False)
+
+    def frames(self, dtype=np.float64):
+        """Returns the prices, entries and exits as DataFrames sharing the (path, symbol) columns, as expected by
+        friday.simulation.simulate_portfolio(). Prices are cast to dtype for the simulation, the signals are views."""
+
+        columns = self.columns()
+        return (self.frame(self.prices.astype(dtype, copy=False), columns),
+                self.frame(self.entries, columns), self.frame(self.exits, columns))
+
+    def symbol(self, symbol: str) -> np.ndarray:
+        """Prices of one symbol with shape (bars, paths)."""
+
+        return self.prices[:, :, self.symbols.index(symbol)]
+
+    def select(self, paths) -> 'PathSet':
+        """Subset of the paths by position, a slice keeps views of the arrays."""
+
+        take = lambda array: None if array is None else array[:, paths]
+        return PathSet(self.index, self.symbols, take(self.prices), take(self.entries), take(self.exits),
+                       self.path_ids[paths], dtype=self.prices.dtype)
+
+    @classmethod
+    def concat(cls, parts: list) -> 'PathSet':
+        """Joins path sets sharing the same index and symbols along the path axis."""
+
+        join = lambda arrays: None if arrays[0] is None else np.concatenate(arrays, axis=1)
+        return cls(parts[0].index, parts[0].symbols,
+                   join([part.prices for part in parts]), join([part.entries for part in parts]),
+                   join([part.exits for part in parts]), parts[0].path_ids.append([part.path_ids for part in parts[1:]]),
+                   dtype=parts[0].prices.dtype)
+
+    def save(self, path: str) -> None:
+        """Writes the paths to a single .npz file, the signals bit-packed to one bit per value."""
+
+        meta = {'symbols': self.symbols, 'shape': self.prices.shape, 'signals': self.entries is not None}
+        signals = {'entries': np.packbits(self.entries), 'exits': np.packbits(self.exits)} if self.entries is not None else {}
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, meta=np.array(json.dumps(meta)), index=self.index.asi8, tz=np.array(str(self.index.tz or '')),
+                 prices=self.prices, path_ids=self.path_ids.values, **signals)
+
+    @classmethod
+    def load(cls, path: str) -> 'PathSet':
+        """Restores paths written by save()."""
+
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            shape = tuple(meta['shape'])
+            index = pd.DatetimeIndex(data['index'])
+            index = index.tz_localize('UTC').tz_convert(str(data['tz'])) if str(data['tz']) else index
+            unpack = lambda name: np.unpackbits(data[name], count=int(np.prod(shape))).astype(np.bool_).reshape(shape)
+            signals = (unpack('entries'), unpack('exits')) if meta['signals'] else (None, None)
+
+            return cls(index, meta['symbols'], data['prices'], *signals, path_ids=data['path_ids'], dtype=data['prices'].dtype)
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from alpaca_trade_api import TimeFrameUnit
+
+from friday.profiling import profiler
+from friday.utils import get_trading_calendar
+
+# Most bars a single session can hold per timeframe unit, extended hours run from 4:00 to 20:00
+SESSION_MINUTES = 16 * 60
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per `per` seconds, with bursts up to `rate`."""
+
+    def __init__(self, rate: float = 200, per: float = 60.0) -> None:
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a request may be sent."""
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.rate
+            time.sleep(wait)
+
+
+class FetchPipeline:
+    """Concurrent bar fetch pipeline for Friday. Splits every requested date range into pages that fit the api limit
+    and sends the pages of all symbols through a bounded thread pool, rate limited and retried with exponential backoff."""
+
+    # Errors raised by the request itself, retrying cannot fix them
+    fatal = (FileNotFoundError, KeyError, TypeError, ValueError)
+
+    def __init__(self,
+                 api,
+                 workers: int = 8,
+                 rate_limit: float = 200,
+                 retries: int = 3,
+                 backoff: float = 0.5) -> None:
+        """Initializes the pipeline.
+        Parameters:
+        api: Data source serving get_bars() (See friday.data.sources)
+        workers: int = 8 (Concurrent requests)
+        rate_limit: float = 200 (Requests per minute, Alpaca allows 200)
+        retries: int = 3 (Attempts after the first failure of a request)
+        backoff: float = 0.5 (Seconds waited before the first retry, doubled on every retry)
+        Usage:
+            >>> pipeline = FetchPipeline(api, workers=8)
+            >>> bars = pipeline.fetch([('SPY', '2016-01-01', '2022-10-07'), ('TQQQ', '2016-01-01', '2022-10-07')], TimeFrame.Day)"""
+
+        self.api = api
+        self.workers = workers
+        self.limiter = RateLimiter(rate_limit, 60.0)
+        self.retries = retries
+        self.backoff = backoff
+
+    def pages(self, start, end, timeframe, limit) -> list:
+        """Splits a date range into (start, end) pages of whole sessions holding at most `limit` bars each.
+        Neighbouring pages share their boundary session, the duplicated bars are dropped when the pages are merged."""
+
+        if not limit or timeframe.unit in (TimeFrameUnit.Week, TimeFrameUnit.Month):
+            return [(start, end)]
+
+        if timeframe.unit == TimeFrameUnit.Minute:
+            bars_per_session = -(-SESSION_MINUTES // timeframe.amount)
+        elif timeframe.unit == TimeFrameUnit.Hour:
+            bars_per_session = -(-SESSION_MINUTES // (60 * timeframe.amount))
+        else:
+            bars_per_session = 1
+        step = max(limit // bars_per_session - 1, 1)
+
+        sessions = get_trading_calendar().sessions_between(start, end)
+        if len(sessions) <= step + 1:
+            return [(start, end)]
+
+        bounds = [str(session.date()) for session in sessions[step:-1:step]]
+        return list(zip([start] + bounds, bounds + [end]))
+
+    def _get(self, symbol, timeframe, start, end, adjustment, limit) -> pd.DataFrame:
+        """Sends one request, retrying failed requests with exponential backoff and jitter."""
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                bars = self.api.get_bars(symbol, timeframe, start=start, end=end, adjustment=adjustment, limit=limit).df
+                bars.index.name = 'timestamp'
+                if profiler.enabled:
+                    profiler.count('api_calls')
+                    profiler.count('bars_fetched', len(bars))
+                    profiler.count('bytes_fetched', int(bars.memory_usage(index=True).sum()))
+                return bars
+            except self.fatal:
+                raise
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                profiler.count('api_retries')
+                time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    def fetch(self,
+              requests: list,
+              timeframe,
+              adjustment: str = 'split',
+              limit: int = 10000) -> list:
+        """Fetches many (symbol, start, end) requests concurrently.
+        Parameters:
+        requests: list (Tuples of symbol, start and end, Format %Y-%m-%d)
+        timeframe: Alpaca TimeFrame object (See friday.utils.trading_)
+        adjustment: str = 'split'
+        limit: int = 10000 (Maximum bars per api request)
+        Returns the bars of every request in the same order."""
+
+        pages = [(x, symbol, *page) for x, (symbol, start, end) in enumerate(requests)
+                 for page in self.pages(start, end, timeframe, limit)]
+
+        with profiler.stage('data.fetch', requests=len(requests), pages=len(pages)), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda page: self._get(page[1], timeframe, page[2], page[3], adjustment, limit), pages)
+            frames = [[] for _ in requests]
+            for (x, *_), bars in zip(pages, results):
+                frames[x].append(bars)
+
+        merged = []
+        for parts in frames:
+            bars = pd.concat(parts) if len(parts) > 1 else parts[0]
+            merged.append(bars[~bars.index.duplicated(keep='last')].sort_index())
+
+        return merged
+
+
+def wide_frame(bars: dict, field: str = 'close', symbols: list = None) -> pd.DataFrame:
+    """Aligns one field of the bars of many symbols into a wide DataFrame with symbol tickers as columns.
+    Parameters:
+    bars: dict (Bars per symbol)
+    field: str = 'close'
+    symbols: list = None (Column order, None keeps the order of bars)"""
+
+    symbols = list(bars) if symbols is None else symbols
+    return pd.DataFrame({symbol: bars[symbol][field] for symbol in symbols}, columns=symbols)
@@ -0,0 +1,140 @@
+import os
+import time
+
+import pandas as pd
+
+
+class Bars:
+    """get_bars() response holding the bars in a DataFrame, like the Alpaca BarsV2 object."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+
+
+class DataSource:
+    """Data source interface for Friday. Every source serves bars through the same get_bars() call as
+    alpaca_trade_api.REST, so any of them can be passed wherever an api is expected."""
+
+    def get_bars(self,
+                 symbol,
+                 timeframe,
+                 start: str = None,
+                 end: str = None,
+                 adjustment: str = 'raw',
+                 limit: int = None) -> Bars:
+        """Returns the bars of one symbol, or of a list of symbols with an added symbol column.
+        Parameters:
+        symbol: str or list
+        timeframe: Alpaca TimeFrame object (See friday.utils.trading_)
+        start: str = None (Format %Y-%m-%d)
+        end: str = None (Format %Y-%m-%d)
+        adjustment: str = 'raw'
+        limit: int = None (Maximum number of bars per symbol)"""
+
+        raise NotImplementedError
+
+
+class AlpacaSource(DataSource):
+    """Live Alpaca data source. The REST client is created on the first request, so building the source needs no network."""
+
+    def __init__(self, key: str, secret: str, url: str = None) -> None:
+        self.key = key
+        self.secret = secret
+        self.url = url
+        self.api = None
+
+    def get_bars(self, symbol, timeframe, start=None, end=None, adjustment='raw', limit=None) -> Bars:
+        if self.api is None:
+            from alpaca_trade_api import REST
+            self.api = REST(self.key, self.secret, base_url=self.url, api_version='v2')     # None keeps the client default endpoint
+        return self.api.get_bars(symbol, timeframe, start=start, end=end, adjustment=adjustment, limit=limit)
+
+
+class ReplaySource(DataSource):
+    """Offline replay data source. Serves bars from the files written by friday.data.cache.BarCache,
+    with optional latency and pagination to load-test the fetch pipeline without network access."""
+
+    def __init__(self,
+                 path: str = 'userdata/bars',
+                 file_format: str = 'parquet',
+                 latency: float = 0.0,
+                 page_size: int = None) -> None:
+        """Initializes the source.
+        Parameters:
+        path: str = 'userdata/bars' (Directory of the bar files, see friday.data.cache)
+        file_format: str = 'parquet' ('parquet' or 'feather')
+        latency: float = 0.0 (Seconds slept for every page served)
+        page_size: int = None (Bars per page, None serves every request as a single page)
+        Usage:
+            >>> api = ReplaySource('userdata/bars', latency=0.05, page_size=1000)
+            >>> api.get_bars('SPY', TimeFrame.Day, start='2022-01-01').df"""
+
+        self.path = path
+        self.file_format = file_format
+        self.latency = latency
+        self.page_size = page_size
+        self.frames = {}
+        self.requests = 0                                                   # Counters for load tests
+        self.pages = 0
+
+    def _frame(self, symbol, timeframe, adjustment) -> pd.DataFrame:
+        key = f"{symbol}_{timeframe}_{adjustment}"
+        if key not in self.frames:
+            file = os.path.join(self.path, f"{key}.{self.file_format}")
+            if not os.path.exists(file):
+                raise FileNotFoundError(f"No replay bars for {symbol} ({timeframe}, {adjustment}) in {self.path}.")
+            bars = pd.read_parquet(file) if self.file_format == 'parquet' else pd.read_feather(file)
+            self.frames[key] = bars.set_index('timestamp').sort_index()
+        return self.frames[key]
+
+    def _page(self, bars) -> pd.DataFrame:
+        """Serves the bars page by page, paying the configured latency for each page."""
+
+        page_size = self.page_size or max(len(bars), 1)
+        pages = []
+        for x in range(0, max(len(bars), 1), page_size):
+            if self.latency:
+                time.sleep(self.latency)
+            self.pages += 1
+            pages.append(bars.iloc[x:x + page_size])
+        return pd.concat(pages)
+
+    def get_bars(self, symbol, timeframe, start=None, end=None, adjustment='raw', limit=None) -> Bars:
+        self.requests += 1
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        frames = []
+
+        for _symbol in symbols:
+            bars = self._frame(_symbol, timeframe, adjustment)
+            dates = bars.index.tz_convert(None).normalize() if bars.index.tz is not None else bars.index.normalize()
+            mask = True
+            if start is not None:
+                mask = mask & (dates >= pd.Timestamp(start).tz_localize(None).normalize())
+            if end is not None:
+                mask = mask & (dates <= pd.Timestamp(end).tz_localize(None).normalize())
+            bars = bars[mask] if start is not None or end is not None else bars
+            bars = self._page(bars.iloc[:limit])
+            if not isinstance(symbol, str):
+                bars = bars.assign(symbol=_symbol)
+            frames.append(bars)
+
+        return Bars(pd.concat(frames))
+
+
+def make_source(config) -> DataSource:
+    """Builds the data source selected in config['data'] ('alpaca' by default, or 'replay').
+    The replay source reads the bar cache directory unless config['data'] sets its own path.
+    Usage:
+        "data": {"source": "replay", "path": "userdata/bars", "latency": 0.0, "page_size": null}"""
+
+    params = dict(config.get('data', {}))
+    source = params.pop('source', 'alpaca')
+    params.setdefault('path', config.get('cache', {}).get('path', 'userdata/bars'))     # Replays the bar cache by default
+    params.setdefault('file_format', config.get('cache', {}).get('file_format', 'parquet'))
+
+    if source == 'alpaca':
+        return AlpacaSource(config['alpaca']['key'], config['alpaca']['secret'], config['alpaca'].get('url'))
+    elif source == 'replay':
+        return ReplaySource(**params)
+
+    raise ValueError(f"Unknown data source '{source}', use 'alpaca' or 'replay'.")
@@ -0,0 +1,159 @@
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from friday.utils import get_trading_calendar
+
+
+class PriceStore:
+    """Memory-mapped price store for Friday. Keeps the OHLCV history of many symbols as contiguous float arrays
+    on disk, one file per field with shape (symbols, dates), next to a small date and symbol index.
+    Opening the store maps the files read-only, so every process reading the same store shares the pages.
+    Every write saves a new version of the files and then switches the manifest (store.json) to it, so readers
+    always see a complete version."""
+
+    fields = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self,
+                 path: str = 'userdata/store') -> None:
+        """Opens an existing store, see PriceStore.write() to create one.
+        Parameters:
+        path: str = 'userdata/store' (Directory holding the store)
+        Usage:
+            >>> PriceStore.write('userdata/store', {'SPY': spy_bars, 'TQQQ': tqqq_bars})
+            >>> store = PriceStore('userdata/store')
+            >>> store.frame('close', start='2022-01-01')"""
+
+        self.path = path
+
+        with open(os.path.join(path, 'store.json')) as f:
+            manifest = json.load(f)
+        self.version = manifest['version']                                      # Suffix of the files of the current write
+        self.previous = manifest['previous']                                    # Version written before, kept for readers
+        self.symbols = manifest['symbols']
+        self.dates = np.load(self._file('dates'), mmap_mode='r')                # datetime64[ns] in UTC
+        self.positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.arrays = {}                                                        # Mapped fields, opened on first access
+
+    @classmethod
+    def open(cls, path: str = 'userdata/store') -> 'PriceStore':
+        """Opens the store at path, None when no store was written there."""
+
+        return cls(path) if os.path.exists(os.path.join(path, 'store.json')) else None
+
+    def covers(self, symbols, start, end) -> bool:
+        """Whether the store holds every symbol and every trading session between start and end, both inclusive."""
+
+        if not set(symbols) <= set(self.positions):
+            return False
+        sessions = get_trading_calendar().sessions_between(start, end).tz_localize(None).values.astype('datetime64[D]')
+        stored = self.dates[self._slice(start, end)].astype('datetime64[D]')
+
+        return bool(np.isin(sessions, stored).all())
+
+    @classmethod
+    def write(cls,
+              path: str,
+              bars: dict) -> 'PriceStore':
+        """Merges the bars of every symbol into the store, aligned on the union of their dates, missing bars are NaN.
+        Symbols and dates already stored are kept, new bars replace the stored bars of the same date.
+        Parameters:
+        path: str (Directory of the store, created when missing)
+        bars: dict (Symbol to DataFrame with open, high, low, close and volume columns and a timestamp index)"""
+
+        os.makedirs(path, exist_ok=True)
+        frames = {symbol: cls._utc(frame[~frame.index.duplicated(keep='last')]) for symbol, frame in bars.items()}
+        previous = cls.open(path)
+        if previous is not None:
+            stored = previous.index()
+            for i, symbol in enumerate(previous.symbols):
+                old = pd.DataFrame({field: previous.array(field)[i] for field in cls.fields}, index=stored).dropna(how='all')
+                frames[symbol] = frames[symbol].combine_first(old) if symbol in frames else old
+        symbols = (previous.symbols if previous is not None else []) + [symbol for symbol in bars if previous is None or symbol not in previous.positions]
+
+        index = pd.DatetimeIndex([], tz='UTC', name='timestamp')
+        for frame in frames.values():
+            index = index.union(frame.index)                                    # Sorted union of the dates of every symbol
+        dates = index.tz_localize(None).values.astype('datetime64[ns]')
+
+        # The files of the new version are invisible to readers until the manifest points at them
+        version = uuid.uuid4().hex[:12]
+        for field in cls.fields:
+            values = np.full((len(symbols), len(index)), np.nan)
+            for i, symbol in enumerate(symbols):
+                values[i] = frames[symbol][field].reindex(index).values
+            np.save(os.path.join(path, f"{field}.{version}.npy"), values)
+        np.save(os.path.join(path, f"dates.{version}.npy"), dates)
+
+        temp = os.path.join(path, f"store.json.{os.getpid()}.tmp")
+        with open(temp, 'w') as f:
+            json.dump({'version': version, 'previous': previous.version if previous is not None else None, 'symbols': symbols}, f)
+        os.replace(temp, os.path.join(path, 'store.json'))
+
+        if previous is not None:                                                # The previous version stays for readers still opening it
+            cls._remove(path, previous.previous)
+
+        return cls(path)
+
+    @staticmethod
+    def _utc(frame) -> pd.DataFrame:
+        """Frame with its index in UTC, naive timestamps are taken as UTC."""
+
+        index = frame.index.tz_localize('UTC') if frame.index.tz is None else frame.index.tz_convert('UTC')
+        return frame.set_axis(index.rename('timestamp'), axis=0)
+
+    @classmethod
+    def _remove(cls, path, version) -> None:
+        """Removes the files of an old version, files still mapped elsewhere stay readable until unmapped."""
+
+        if version is None:
+            return
+        for name in (*cls.fields, 'dates'):
+            try:
+                os.remove(os.path.join(path, f"{name}.{version}.npy"))
+            except OSError:                                                     # Already removed or still open on Windows
+                pass
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.{self.version}.npy")
+
+    def array(self, field: str) -> np.ndarray:
+        """Returns the read-only memory-mapped array of a field with shape (symbols, dates)."""
+
+        if field not in self.arrays:
+            self.arrays[field] = np.load(self._file(field), mmap_mode='r')
+        return self.arrays[field]
+
+    def index(self, start=None, end=None) -> pd.DatetimeIndex:
+        """Returns the dates of the store between start and end as a UTC DatetimeIndex."""
+
+        dates = self.dates[self._slice(start, end)]
+        return pd.DatetimeIndex(dates, name='timestamp').tz_localize('UTC')      # Named like the index of the bars
+
+    def _slice(self, start, end) -> slice:
+        """Date positions between start and end (both inclusive, Format %Y-%m-%d) found with a binary search."""
+
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, 'ns'), side='left')
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end, 'D') + 1, side='left')
+        return slice(lo, hi)
+
+    def series(self, symbol: str, field: str = 'close', start=None, end=None) -> np.ndarray:
+        """Returns a zero-copy view on the contiguous values of one symbol."""
+
+        return self.array(field)[self.positions[symbol], self._slice(start, end)]
+
+    def frame(self, field: str = 'close', symbols=None, start=None, end=None) -> pd.DataFrame:
+        """Returns a field as a DataFrame with symbol tickers as columns.
+        The DataFrame is a view on the mapped array when all symbols are selected."""
+
+        dates = self._slice(start, end)
+        if symbols is None:
+            symbols = self.symbols
+            values = self.array(field)[:, dates]
+        else:
+            values = self.array(field)[[self.positions[symbol] for symbol in symbols], dates]
+
+        return pd.DataFrame(values.T, index=self.index(start, end), columns=symbols, copy=False)
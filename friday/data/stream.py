@@ -0,0 +1,54 @@
+from friday.utils import get_trading_calendar
+
+from .pipeline import FetchPipeline, wide_frame
+
+
+def session_windows(start: str, end: str, sessions: int = 20) -> list:
+    """Splits start ... end into windows of `sessions` trading sessions. Neighbouring windows share their boundary
+    day, like the pages of friday.data.pipeline, so no bar is lost whether the api treats the end as inclusive or not.
+    Returns (start, end) pairs of dates. Format %Y-%m-%d"""
+
+    days = get_trading_calendar().sessions_between(start, end)
+    bounds = [str(day.date()) for day in days[sessions::sessions]]
+
+    return list(zip([start] + bounds, bounds + [end]))
+
+
+def stream_bars(api,
+                symbols: list,
+                timeframe,
+                start: str,
+                end: str,
+                sessions: int = 20,
+                field: str = 'close',
+                adjustment: str = 'split',
+                fetch: dict = None):
+    """Streams the bars of many symbols window by window instead of loading the whole range, so memory is bounded
+    by `sessions` rather than by the length of the history. Every window is fetched concurrently through the
+    fetch pipeline, bars repeated on the shared boundary day of two windows are yielded once.
+    Parameters:
+    api: Data source serving get_bars(), see friday.data.sources
+    symbols: list
+    timeframe: Alpaca TimeFrame object (See friday.utils.trading_)
+    start: str (Format %Y-%m-%d)
+    end: str (Format %Y-%m-%d)
+    sessions: int = 20 (Trading sessions per chunk, 20 sessions of 1 minute bars are about 19200 bars per symbol)
+    field: str = 'close'
+    adjustment: str = 'split'
+    fetch: dict = None (FetchPipeline parameters, see friday.data.pipeline)
+    Usage:
+        >>> for close in stream_bars(api, ['SPY', 'TQQQ'], TimeFrame.Minute, '2020-01-01', '2022-10-07'):
+        ...     backtest.update(close)
+    Yields DataFrames with symbol tickers as columns and strictly increasing timestamps across chunks."""
+
+    pipeline = FetchPipeline(api, **(fetch or {}))
+    last = None
+
+    for window_start, window_end in session_windows(start, end, sessions):
+        bars = pipeline.fetch([(symbol, window_start, window_end) for symbol in symbols], timeframe, adjustment)
+        chunk = wide_frame(dict(zip(symbols, bars)), field, symbols)
+        if last is not None:
+            chunk = chunk[chunk.index > last]                           # Boundary day already yielded by the previous window
+        if len(chunk):
+            last = chunk.index[-1]
+            yield chunk
@@ -1,10 +1,15 @@
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
-import vectorbt as vbt
+import pytz
 
-from friday.utils import generate_random_market_dates, get_future_dates
+from friday.profiling import profiled
+from friday.utils import generate_random_market_indices, get_future_dates
 
 from .base import Base
+from .pipeline import wide_frame
+from .store import PriceStore
 
 
 class Synthesizer(Base):
@@ -39,45 +44,139 @@ class Synthesizer(Base):
 
         super().__init__(start, end, simulation_start, days, api, config, interval) # super() functions enables the parent class functionality inside the child class
         self.data_stored = False
+        # Resampling of the historical sessions, config['bootstrap'] = {'method': 'sample' | 'block' | 'stationary', 'block': 5}
+        self.bootstrap = {'method': 'sample', 'block': 5, **config.get('bootstrap', {})}
+        self.growth = None                                                      # Daily growth matrix of the last close history, see growth_matrix()
+
+    @profiled('data.close_history')
+    def close_history(self,
+                      adjustment: str = 'split',
+                      max_limit: int = 10000) -> pd.DataFrame:
+        """Downloads the closing prices of every symbol from the start date till the current date.
+        Parameters:
+        adjustment: str = 'split'
+        max_limit: int = 10000 (Maximum bars per api request, longer ranges are paginated)
+        Returns a DataFrame with symbol tickers as columns and a normalized date index."""
+
+        # The memory-mapped store holds split adjusted daily bars, it is read when it covers every session until today
+        today = str(datetime.now(pytz.timezone('US/Eastern')).date())
+        stored = self.interval == '1d' and adjustment == 'split'
+        path = self.config.get('store', {}).get('path', 'userdata/store')
+        store = PriceStore.open(path) if stored else None
+        if store is not None and store.covers(self.symbols, self.start, today):
+            close = store.frame('close', self.symbols, start=self.start, end=today)
+        else:
+            bars = self.cache.get_many(self.symbols, self.trading_timeframe, start=self.start, adjustment=adjustment, limit=max_limit) # Get data from the cache, see friday.data.cache
+            close = wide_frame(bars, 'close', self.symbols)
+            if stored:
+                PriceStore.write(path, bars)                                    # Merged into the store for the next runs
+        close.index = close.index.normalize() # Normalizes the time unit to easily compare with future time indexes
+
+        return close
+
+    def growth_matrix(self, close: pd.DataFrame) -> np.ndarray:
+        """Daily growth factors (1 + return) of every session and symbol, computed once per close history.
+        Row r holds the growth from session r to session r + 1, shape (sessions - 1, symbols)."""
+
+        if self.growth is None or self.growth[0] is not close:
+            self.growth = (close, growth_matrix(close.values))
+        return self.growth[1]
+
+    @profiled('synthesis.project')
+    def project(self,
+                close: pd.DataFrame,
+                days: int,
+                paths: int = 1,
+                rng=None) -> np.ndarray:
+        """Projects the closing prices into the future for many paths at once.
+        Every future day reuses the daily return of a randomly drawn historical session between start and end,
+        the same session for all symbols of a path so cross-asset correlation is kept. Sessions are drawn
+        with the method of self.bootstrap, the block methods keep runs of consecutive sessions.
+        Parameters:
+        close: pd.DataFrame (Historical closing prices, see close_history())
+        days: int (Number of future sessions to project)
+        paths: int = 1
+        rng: np.random.Generator, SeedSequence or int seed = None
+        Returns the projected prices as an array with shape (days, paths, symbols)."""
+
+        active_days, indices = generate_random_market_indices(self.start, self.end, days, paths, rng=rng,
+                                                              **self.bootstrap) # Returns random sessions. See friday.utils.random_
+        rows = close.index.get_indexer(active_days)[indices]
+        if (rows < 0).any():                                                    # get_indexer marks sessions missing from the history with -1
+            missing = active_days[np.unique(indices[rows < 0])]
+            raise ValueError(f"Sessions {[str(day.date()) for day in missing]} are missing from the close history.")
+
+        return project_prices(close.values, rows, self.growth_matrix(close))
 
+    @profiled('synthesis.synthetic_data')
     def synthetic_data(self,
                        adjustment: str = 'split',
                        max_limit: int = 10000,
-                       write_to_csv: bool = False) -> pd.DataFrame:
+                       write_to_csv: bool = False,
+                       paths: int = None,
+                       rng=None) -> pd.DataFrame:
         """Synthetic data function downloads the historical data till the current date then projects into the future with a custom calculation method and combines the results.
         Parameters:
         adjustment: str = 'split'
         max_limit: int = 10000 (DataFrame values to be fetched, cannot exceed 10000)
-        write_to_csv: bool = False. (True will generate a csv file with the closing prices from historical data till the projected date."""
+        write_to_csv: bool = False. (True will generate a csv file with the closing prices from historical data till the projected date.
+        paths: int = None (Number of paths to project. None returns a single path with symbol tickers as columns,
+        otherwise a wide DataFrame with (path, symbol) MultiIndex columns is returned)
+        rng: np.random.Generator, SeedSequence or int seed = None"""
 
-        close = pd.DataFrame(columns=self.symbols) # Empty dataframe with symbol tickers as columns
         future_index = get_future_dates(self.start, self.simulation_end)
-        selected_random_dates = generate_random_market_dates(self.start, self.end, future_index) # Returns random dates. See friday.utils.random_
-        fi = pd.DataFrame(index=future_index, columns=['close'], dtype='float') # Empty dataframe with future dates as index and close as column value
+        close = self.close_history(adjustment=adjustment, max_limit=max_limit)
+        future = self.project(close, len(future_index), 1 if paths is None else paths, rng=rng)
 
-        # For loop that gets close for each symbol, calculates synthetic prices for future dates and returns the result.
-        for symbol in self.symbols:
+        if paths is None:
+            fi = pd.DataFrame(future[:, 0], index=future_index, columns=self.symbols)
+            projected_data = pd.concat([close, fi]) # Concatenates the result
 
-            alpaca_data = self.api.get_bars(symbol, self.trading_timeframe, start=self.start, adjustment=adjustment, limit=max_limit).df.get(['close']) # Get data from alpaca api
-            alpaca_data.index = alpaca_data.index.normalize() # Normalizes the time unit to easily compare with future time indexes
-            random_alpaca_data = alpaca_data.loc[selected_random_dates] # Aligns the data for the random dates in a separate dataframe for the percent calculation
-            random_percent_change = random_alpaca_data.pct_change().iloc[::-2][::-1] # Uses a pandas built-in pct_change() function which returns the percentage change between every row, then
-                                                                                     # the dataframe is flipped and every 2 row is skipped using [::-2] and then it is flipped back with [::-1]
+        else:
+            projected_data = stack_paths(close, future, future_index, range(paths))
 
-            for x in range(len(future_index)):
-                if x == 0:
-                    result = (alpaca_data.iloc[-1] * (1 + random_percent_change.iloc[0])).iloc[-1] # Synthetic price calculation
-                    fi.iloc[x] = result # Store the result in the dataframe
+        if write_to_csv: # Optional parameter to write in CSV
+            projected_data.to_csv(f"close_data.csv")
 
-                elif x > 0:
-                    result = (fi.iloc[x-1] * (1 + random_percent_change.iloc[x]))
-                    fi.iloc[x] = result # Store the result in the dataframe
+        return projected_data
 
-            projected_data = pd.concat([alpaca_data, fi]) # Concatenates the result
-            close[symbol] = projected_data # Stores the result in a dataframe
 
-        if write_to_csv: # Optional parameter to write in CSV
-            close.to_csv(f"close_data.csv")
-        
-        return close
-        
\ No newline at end of file
+def growth_matrix(close) -> np.ndarray:
+    """Daily growth factors (1 + return) of a (sessions, symbols) price array, row r is the growth from session r to r + 1."""
+
+    random_percent_change = close[1:] / close[:-1] - 1
+    return 1 + random_percent_change
+
+
+def project_prices(close, rows, growth=None) -> np.ndarray:
+    """Projects closing prices by compounding the daily returns of the given historical rows.
+    Parameters:
+    close: np.ndarray (Historical closing prices, shape (sessions, symbols))
+    rows: np.ndarray (Rows of close whose daily return is reused per future day, shape (days, paths))
+    growth: np.ndarray = None (Precomputed growth_matrix(close), computed from close when not given)
+    Returns the projected prices with shape (days, paths, symbols)."""
+
+    growth = growth_matrix(close) if growth is None else growth
+
+    prices = np.empty((rows.shape[0] + 1, rows.shape[1], close.shape[1]))
+    prices[0] = close[-1]                                                       # Last known price is the starting point of every path
+    np.take(growth, rows - 1, axis=0, out=prices[1:])                           # Fancy indexing gathers (days, paths, symbols) at once
+    np.cumprod(prices, axis=0, out=prices)                                      # Synthetic price calculation, compounded in place
+
+    return prices[1:]
+
+
+def stack_paths(close, future, future_index, path_ids) -> pd.DataFrame:
+    """Combines the shared history with the projected prices of every path into one wide DataFrame.
+    Parameters:
+    close: pd.DataFrame (Historical closing prices with symbol tickers as columns)
+    future: np.ndarray (Projected prices with shape (days, paths, symbols))
+    future_index: list (Future dates)
+    path_ids: Iterable (Label of every path)
+    Returns a DataFrame with (path, symbol) MultiIndex columns."""
+
+    columns = pd.MultiIndex.from_product([path_ids, close.columns], names=['path', 'symbol'])
+    history = np.tile(close.values, (1, future.shape[1]))                        # Every path shares the same history
+    values = np.concatenate([history, future.reshape(len(future_index), -1)])
+
+    return pd.DataFrame(values, index=close.index.append(pd.Index(future_index)), columns=columns)
@@ -5,34 +5,20 @@ import json
 
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import vectorbt as vbt
-from alpaca_trade_api import REST
 from rich import print
 
-from friday.data import Fetcher, Synthesizer
+from friday.data import Fetcher, Synthesizer, make_source
+from friday.profiling import profiler
+from friday.simulation import (ResultAggregator, RiskMetrics, SimulationRunner,
+                               density_heatmap, fan_chart, simulate_portfolio)
 from friday.strategies import Strategy
+from friday.utils import get_future_dates
 
-# Sets maximum number of rows to be displayed in pandas data_types.
-pd.set_option('display.max_rows', None)
+def simulate(s, config, _range):
+    """Runs every future simulation as a separate portfolio.
+    Returns the cumulative returns and SPY prices per simulation."""
 
-
-def main():
-
-    with open(r'config.json') as config: # Reads config.json
-        config = json.load(config)       # Loads the variable attributes in config   
-    api = REST(config['alpaca']['key'], config['alpaca']['secret'], api_version='v2')
-
-    # _range: number of future simulations to generate
-    _range = range(5)
-
-    # start: start of window that will be used to gather "synthetic" data, for forward-walk
-    # end: end of "synthetic" data window.
-    # simulation_start: when to start calulating the potfolio gain. past dates will use real data.
-    s = Synthesizer(start='2022-06-17', end='2022-08-17', simulation_start='2022-10-17', days=15, api=api, config=config)
-    iterables = [[x for x in _range], ["SPY", "TQQQ", "SPXL", "UVXY", "SQQQ", "BSV", "TECL"]]
-    index = pd.MultiIndex.from_product(iterables)
-    result = pd.DataFrame(columns=index)
     cum_returns = pd.DataFrame(columns=_range)
     spy_plot = pd.DataFrame(columns=_range)
 
@@ -41,40 +27,118 @@ def main():
         ste = Strategy(config)
         data, entries, exits = ste.strategy(data, s.days)
 
-        pf = vbt.Portfolio.from_signals(
-            close=data,
-            entries=entries,
-            exits=exits,
-            price=data,
-            cash_sharing=True,
-            val_price=data.vbt.fshift(1),
-            slippage=0.0,       # set slippage
-            init_cash=100000,   # initial cash from 1000 to 10000
-            group_by=True,
-            call_seq='auto',
-            freq='d')
-
-        print(pf.stats())
+        with profiler.stage('portfolio.from_signals'):
+            pf = vbt.Portfolio.from_signals(
+                close=data,
+                entries=entries,
+                exits=exits,
+                price=data,
+                cash_sharing=True,
+                val_price=data.vbt.fshift(1),
+                slippage=0.0,       # set slippage
+                init_cash=100000,   # initial cash from 1000 to 10000
+                group_by=True,
+                call_seq='auto',
+                freq='d')
+
         cum_returns[x] = pf.cumulative_returns(group_by=True)
         spy_plot[x] = data['SPY']
+        profiler.count('paths_completed')
+
+    return cum_returns, spy_plot
+
+
+def simulate_batch(s, config, _range):
+    """Projects every future simulation at once and runs them as a single portfolio grouped by path,
+    so indicator, signal and portfolio overhead is paid once.
+    Returns the cumulative returns and SPY prices per simulation."""
+
+    close = s.close_history()
+    future_index = get_future_dates(s.start, s.simulation_end)
+    future = s.project(close, len(future_index), paths=len(_range))   # (days, paths, symbols) projection of every simulation
+    ste = Strategy(config)
+    paths = ste.signal_paths(close, future, future_index, s.days)       # Compact float32 prices and boolean signals, see friday.data.paths
+
+    pf = simulate_portfolio(*paths.frames())
+
+    cum_returns = pf.cumulative_returns()
+    spy_plot = pd.DataFrame(paths.symbol('SPY'), index=paths.index, columns=paths.path_ids)
+    profiler.count('paths_completed', len(_range))
+
+    return cum_returns, spy_plot
+
+
+def main(config=None,
+         paths: int = 5,
+         batch: bool = True,
+         workers: int = None,
+         seed: int = None,
+         sample: int = 5,
+         curves: str = None,
+         start: str = '2022-06-17',
+         end: str = '2022-08-17',
+         simulation_start: str = '2022-10-17',
+         days: int = 15,
+         show: bool = True):
+    """Runs the future simulations and writes their charts, see friday.cli for the command line.
+    Parameters:
+    config: dict = None (Configuration loaded from config.json, None reads config.json)
+    paths: int = 5 (Number of future simulations to generate)
+    batch: bool = True (Runs all simulations as one wide portfolio instead of one portfolio per simulation)
+    workers: int = None (Number of processes running the batch in parallel, None keeps the batch in this process)
+    seed: int = None (Master seed of the parallel runner, the same seed reproduces the same simulations)
+    sample: int = 5 (Number of whole simulation curves highlighted in the charts, statistics always cover every simulation)
+    curves: str = None (Directory every simulation curve is written to, None keeps only the sampled ones)
+    start: str = '2022-06-17' (Start of window that will be used to gather "synthetic" data, for forward-walk)
+    end: str = '2022-08-17' (End of "synthetic" data window)
+    simulation_start: str = '2022-10-17' (When to start calulating the potfolio gain. past dates will use real data)
+    days: int = 15 (Number of simulated sessions)
+    show: bool = True (Opens the charts in the browser besides writing them to html)"""
+
+    if config is None:
+        with open(r'config.json') as config: # Reads config.json
+            config = json.load(config)       # Loads the variable attributes in config
+    api = make_source(config)                # Alpaca or offline replay, selected by the 'data' entry of config.json
+
+    # Sets maximum number of rows to be displayed in pandas data_types.
+    pd.set_option('display.max_rows', None)
+
+    # _range: number of future simulations to generate
+    _range = range(paths)
+
+    s = Synthesizer(start=start, end=end, simulation_start=simulation_start, days=days, api=api, config=config)
+
+    # Results are streamed into fixed-memory aggregators, see friday.simulation.aggregator
+    # Both sample with the same seed so they keep the same simulations
+    returns = ResultAggregator(sample=sample, curves=curves, seed=0)
+    spy = ResultAggregator(returns=False, sample=sample, seed=0)
+    # Value at risk, drawdowns and ruin over every simulation, see friday.simulation.risk
+    risk = RiskMetrics(**config.get('risk', {}))
 
-        # if x == 0:
-        #     worst_drawdown = abs(pf.drawdown(group_by=True).min()) * 100
-        #     temp_save_plot = pf.plot_drawdowns(group_by=True).show()
+    if workers:
+        SimulationRunner(s, config, workers=workers, seed=seed).aggregate(len(_range), returns, spy, risk)
+    else:
+        cum_returns, spy_plot = simulate_batch(s, config, _range) if batch else simulate(s, config, _range)
+        returns.update(cum_returns)
+        spy.update(spy_plot)
+        risk.update(cum_returns)
 
-        # elif x > 0:
-        #     if worst_drawdown < (abs(pf.drawdown(group_by=True).min()) * 100):
-        #         worst_drawdown = abs(pf.drawdown(group_by=True).min()) * 100
-        #         temp_save_plot = pf.plot_drawdowns(group_by=True).show()
+    print(returns.summary())
+    print(risk.summary())
+    print(returns.bands())
 
-    fig1 = px.line(cum_returns, x=cum_returns.index, y=cum_returns.columns[:], title='Cumulative Returns')
+    # Charts are drawn from the aggregated quantiles, their size does not grow with the number of simulations
+    fig1 = fan_chart(returns, 'Cumulative Returns')
     fig1.add_hline(y=0, line_dash="dot")
-    fig2 = px.line(spy_plot, x=spy_plot.index, y=spy_plot.columns[:], title='SPY')
-    fig1.write_html("cumulative.html")
-    fig2.write_html("spy.html")
-    #temp_save_plot.show()
-    fig1.show()
-    fig2.show()
+    fig2 = fan_chart(spy, 'SPY')
+    fig3 = density_heatmap(returns, 'Cumulative Returns Density')
+    with profiler.stage('report.write_html'):
+        fig1.write_html("cumulative.html")
+        fig2.write_html("spy.html")
+        fig3.write_html("density.html")
+    if show:
+        fig1.show()
+        fig2.show()
 
 if __name__ == '__main__':
     # __name__ == '__main__' checks if a file is imported as a module or not.
@@ -0,0 +1,2 @@
+from .sweep import ParameterSweep, portfolio_metrics
+from .walkforward import WalkForward
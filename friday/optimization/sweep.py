@@ -0,0 +1,136 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import vectorbt as vbt
+
+from friday.simulation import simulate_portfolio
+from friday.strategies import generate_signals
+
+# Parameters changing the indicators, every other parameter is a threshold of the decision tree
+WINDOW_PARAMS = ['ma_fast', 'ma_slow', 'rsi_period']
+
+
+class ParameterSweep:
+    """Grid optimization of the strategy parameters. Every indicator window variant is computed once with
+    vectorbt's multi-parameter run, the thresholds of all combinations are evaluated as broadcast array comparisons
+    and all combinations are simulated as one portfolio grouped by combination."""
+
+    def __init__(self,
+                 strategy,
+                 grid: dict,
+                 init_cash: float = 10000,
+                 metric: str = 'sharpe_ratio',
+                 chunk_size: int = 1000) -> None:
+        """Initializes the sweep.
+        Parameters:
+        strategy: friday.strategies.Strategy (Parameters missing from the grid keep the strategy values)
+        grid: dict (Values to try per parameter, any entry of strategy.params)
+        init_cash: float = 10000
+        metric: str = 'sharpe_ratio' (Column of the metrics table the combinations are ranked by, highest first)
+        chunk_size: int = 1000 (Combinations simulated per portfolio, bounds the memory use)
+        Usage:
+            >>> sweep = ParameterSweep(Strategy(config), {'ma_slow': [150, 200, 250], 'tqqq_overbought': range(75, 85)})
+            >>> sweep.run(close).head()"""
+
+        unknown = set(grid) - set(strategy.params)
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters {sorted(unknown)}, use any of {list(strategy.params)}.")
+
+        self.strategy = strategy
+        self.grid = {name: list(values) if np.ndim(values) else [values] for name, values in grid.items()}
+        self.init_cash = init_cash
+        self.metric = metric
+        self.chunk_size = chunk_size
+
+    def combinations(self) -> pd.DataFrame:
+        """Returns one row per parameter combination, the cartesian product of the grid."""
+
+        params = {**{name: [value] for name, value in self.strategy.params.items()}, **self.grid}
+        combos = pd.DataFrame(list(itertools.product(*params.values())), columns=list(params))
+        combos.index.name = 'combo'
+
+        return combos
+
+    def indicators(self, close, combos):
+        """Computes every moving average and RSI variant needed by the combinations in one multi-parameter run each.
+        Returns the moving averages and RSI with shape (bars, variants, symbols) and their windows."""
+
+        shape = (len(close), -1, close.shape[1])
+        windows = sorted(set(combos['ma_fast']) | set(combos['ma_slow']))
+        periods = sorted(set(combos['rsi_period']))
+
+        ma = vbt.MA.run(close, window=windows).ma.values.reshape(shape)
+        rsi = vbt.talib('rsi').run(close, timeperiod=periods).real.values.reshape(shape)
+
+        return ma, np.array(windows), rsi, np.array(periods)
+
+    def evaluate(self, combos, prices, index, ma, windows, rsi, periods) -> pd.DataFrame:
+        """Simulates the given combinations over a range of bars whose indicators are already computed.
+        Parameters:
+        combos: pd.DataFrame (Combinations to simulate, see combinations())
+        prices: np.ndarray (Closing prices of the bars, shape (bars, symbols))
+        index: pd.Index (Dates of the bars)
+        ma, windows, rsi, periods: Indicators of the same bars and their windows, see indicators()
+        Returns the metrics table with the parameters of every combination, unranked."""
+
+        symbols = self.strategy.symbols
+        metrics = []
+        for start in range(0, len(combos), self.chunk_size):
+            chunk = combos.iloc[start:start + self.chunk_size]
+            size = len(chunk)
+
+            # Fancy indexing picks the indicator variant of every combination, shape (bars, combinations, symbols)
+            targets = self.strategy.select_targets(
+                np.broadcast_to(prices[:, None, :], (len(prices), size, len(symbols))),
+                ma[:, np.searchsorted(windows, chunk['ma_fast'])],
+                ma[:, np.searchsorted(windows, chunk['ma_slow'])],
+                rsi[:, np.searchsorted(periods, chunk['rsi_period'])],
+                params={name: chunk[name].values for name in chunk.columns if name not in WINDOW_PARAMS})
+            entries, exits = generate_signals(targets, len(symbols))
+
+            columns = pd.MultiIndex.from_product([chunk.index, symbols], names=['combo', 'symbol'])
+            data = pd.DataFrame(np.tile(prices, (1, size)), index=index, columns=columns)
+            entries = pd.DataFrame(entries.reshape(len(prices), -1), index=index, columns=columns)
+            exits = pd.DataFrame(exits.reshape(len(prices), -1), index=index, columns=columns)
+
+            pf = simulate_portfolio(data, entries, exits, init_cash=self.init_cash, group_by='combo')
+            metrics.append(portfolio_metrics(pf))
+
+        return combos.join(pd.concat(metrics))
+
+    def rank(self, table: pd.DataFrame) -> pd.DataFrame:
+        """Sorts a metrics table by self.metric, best combination first."""
+
+        return table.sort_values(self.metric, ascending=False, kind='stable')
+
+    def run(self, close: pd.DataFrame) -> pd.DataFrame:
+        """Simulates every parameter combination over the closing prices.
+        Parameters:
+        close: pd.DataFrame (Historical closing prices with symbol tickers as columns)
+        Returns the metrics table with the parameters of every combination, ranked by self.metric."""
+
+        close = close[self.strategy.symbols]
+        combos = self.combinations()
+        ma, windows, rsi, periods = self.indicators(close, combos)
+
+        # Every combination is evaluated after the longest window so all of them trade the same bars
+        rows = slice(max(windows.max(), periods.max()), None)
+        table = self.evaluate(combos, close.values[rows], close.index[rows], ma[rows], windows, rsi[rows], periods)
+
+        return self.rank(table)
+
+
+def portfolio_metrics(pf) -> pd.DataFrame:
+    """Summary metrics of a grouped portfolio, one row per group."""
+
+    groups = pf.wrapper.get_columns()                   # vectorbt returns scalars for a single group
+    return pd.DataFrame({
+        'total_return': np.atleast_1d(pf.total_return()),
+        'annualized_return': np.atleast_1d(pf.annualized_return()),
+        'sharpe_ratio': np.atleast_1d(pf.sharpe_ratio()),
+        'sortino_ratio': np.atleast_1d(pf.sortino_ratio()),
+        'max_drawdown': np.atleast_1d(pf.max_drawdown()),
+        'calmar_ratio': np.atleast_1d(pf.calmar_ratio()),
+        'orders': np.atleast_1d(pf.orders.count())
+    }, index=groups)
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from friday.strategies import Strategy
+
+from .sweep import ParameterSweep
+
+# Read-only state of a worker process, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(path, config, grid, options, combos, index, windows, periods):
+    """Maps the full-history prices and indicators read-only, every window only slices them.
+    The sweep is rebuilt from the configuration, grid and options instead of being pickled."""
+
+    for name in ['prices', 'ma', 'rsi']:
+        _worker[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+    _worker['sweep'] = ParameterSweep(Strategy(config), grid, **options)
+    _worker['combos'] = combos
+    _worker['index'] = index
+    _worker['windows'] = windows
+    _worker['periods'] = periods
+
+
+def _evaluate(combos, rows) -> pd.DataFrame:
+    w = _worker
+    return w['sweep'].evaluate(combos, w['prices'][rows], w['index'][rows], w['ma'][rows], w['windows'], w['rsi'][rows], w['periods'])
+
+
+def _run_window(in_sample, out_of_sample):
+    """Tunes the strategy on the in-sample bars and scores the best combination on the out-of-sample bars.
+    Returns the in-sample and out-of-sample metrics of the best combination."""
+
+    ranked = _worker['sweep'].rank(_evaluate(_worker['combos'], in_sample))
+    best = ranked.iloc[:1]
+
+    return best, _evaluate(_worker['combos'].loc[best.index], out_of_sample)
+
+
+class WalkForward:
+    """Walk-forward optimization for Friday. Splits the history into rolling in-sample and out-of-sample windows,
+    tunes the strategy with a parameter sweep on every in-sample window and scores the chosen parameters on the
+    out-of-sample window that follows. The indicators are computed once over the full history and sliced per window,
+    windows run in parallel across a process pool."""
+
+    def __init__(self,
+                 sweep: ParameterSweep,
+                 in_sample: int = 504,
+                 out_of_sample: int = 126,
+                 step: int = None,
+                 workers: int = None,
+                 mp_context=None) -> None:
+        """Initializes the walk-forward.
+        Parameters:
+        sweep: friday.optimization.ParameterSweep (Strategy, parameter grid and ranking metric)
+        in_sample: int = 504 (Bars the parameters are tuned on, 2 years of sessions)
+        out_of_sample: int = 126 (Bars the tuned parameters are scored on, half a year of sessions)
+        step: int = None (Bars between window starts, None uses out_of_sample so the out-of-sample windows are contiguous)
+        workers: int = None (Number of worker processes, None uses every core and 1 runs in the current process)
+        mp_context: multiprocessing context = None (Start method of the workers, None uses the platform default)
+        Usage:
+            >>> sweep = ParameterSweep(Strategy(config), {'ma_slow': [150, 200, 250], 'tqqq_overbought': range(75, 85)})
+            >>> WalkForward(sweep, in_sample=504, out_of_sample=126, workers=4).run(close)"""
+
+        self.sweep = sweep
+        self.in_sample = in_sample
+        self.out_of_sample = out_of_sample
+        self.step = step or out_of_sample
+        self.workers = workers or os.cpu_count()
+        self.mp_context = mp_context
+
+    def windows(self, start: int, n_bars: int) -> list:
+        """Returns the (in-sample, out-of-sample) row slices of every window fitting between start and n_bars."""
+
+        length = self.in_sample + self.out_of_sample
+        return [(slice(x, x + self.in_sample), slice(x + self.in_sample, x + length))
+                for x in range(start, n_bars - length + 1, self.step)]
+
+    def run(self, close: pd.DataFrame) -> pd.DataFrame:
+        """Runs the walk-forward over the closing prices.
+        Parameters:
+        close: pd.DataFrame (Historical closing prices with symbol tickers as columns)
+        Returns one row per window with its dates, the chosen parameters and the in-sample and out-of-sample metrics."""
+
+        sweep = self.sweep
+        close = close[sweep.strategy.symbols]
+        combos = sweep.combinations()
+        ma, windows, rsi, periods = sweep.indicators(close, combos)
+
+        # The first window starts once every indicator variant is defined
+        splits = self.windows(max(windows.max(), periods.max()), len(close))
+        if not splits:
+            raise ValueError(f"History of {len(close)} bars is too short for windows of {self.in_sample} + {self.out_of_sample} bars.")
+
+        # The full-history arrays are written once and mapped read-only by every worker instead of being pickled per window
+        path = tempfile.mkdtemp(prefix='friday_')
+        for name, values in [('prices', close.values), ('ma', ma), ('rsi', rsi)]:
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(values))
+        options = {'init_cash': sweep.init_cash, 'metric': sweep.metric, 'chunk_size': sweep.chunk_size}
+        initargs = (path, sweep.strategy.config, sweep.grid, options, combos, close.index, windows, periods)
+
+        try:
+            if self.workers == 1:
+                _init_worker(*initargs)
+                results = [_run_window(*split) for split in splits]
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(splits)), mp_context=self.mp_context,
+                                         initializer=_init_worker, initargs=initargs) as executor:
+                    results = list(executor.map(_run_window, *zip(*splits)))
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        rows = []
+        for (in_sample, out_of_sample), (best, scored) in zip(splits, results):
+            params = best[combos.columns].iloc[0]
+            rows.append({
+                'in_sample_start': close.index[in_sample.start],
+                'in_sample_end': close.index[in_sample.stop - 1],
+                'out_of_sample_start': close.index[out_of_sample.start],
+                'out_of_sample_end': close.index[out_of_sample.stop - 1],
+                'combo': best.index[0],
+                **params.to_dict(),
+                **best.drop(columns=combos.columns).iloc[0].add_prefix('is_').to_dict(),
+                **scored.drop(columns=combos.columns).iloc[0].add_prefix('oos_').to_dict()
+            })
+
+        table = pd.DataFrame(rows)
+        table.index.name = 'window'
+
+        return table
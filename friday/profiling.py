@@ -0,0 +1,202 @@
+"""
+Profiling instrumentation for Friday.
+
+Stage timers and counters recorded by the data, strategy, simulation and report steps. Disabled by default,
+a disabled stage costs one attribute check. An enabled run is written as a Chrome trace JSON file that
+chrome://tracing, Perfetto or speedscope can open, one stage can also be captured with cProfile or pyinstrument.
+> python -m friday --profile simulate
+> python -m friday --profile --capture portfolio.from_signals simulate
+"""
+
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class _NullStage:
+    """Shared no-op stage returned while the profiler is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null = _NullStage()
+
+
+class _Stage:
+    """One timed occurrence of a stage, recorded as a Chrome trace complete event when it exits."""
+
+    def __init__(self, profiler, name, args) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.capture = self.profiler._start_capture(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler._stop_capture(self.capture)
+        self.profiler._event({'name': self.name, 'ph': 'X', 'ts': self.profiler._us(self.start),
+                              'dur': (end - self.start) * 1e6, 'args': self.args})
+        return False
+
+
+class Profiler:
+    """Stage timers and counters of a run. Stages may nest and run on many threads, counters are totals
+    that are also recorded over time. Worker processes of friday.simulation.runner keep their own,
+    disabled profiler, their chunks show up as the simulation.chunk stages of the main process."""
+
+    def __init__(self,
+                 enabled: bool = False,
+                 path: str = 'userdata/profile',
+                 capture: str = None,
+                 tool: str = 'cprofile') -> None:
+        """Initializes the profiler.
+        Parameters:
+        enabled: bool = False
+        path: str = 'userdata/profile' (Directory the trace and captured profiles are written to)
+        capture: str = None (Stage name profiled with `tool` on every occurrence, e.g. 'portfolio.from_signals')
+        tool: str = 'cprofile' ('cprofile' writes a .prof file for pstats or snakeviz, 'pyinstrument' an .html
+        report per occurrence and needs pyinstrument installed)
+        Usage:
+            >>> profiler.configure(enabled=True, capture='strategy.signals')
+            >>> with profiler.stage('data.fetch', pages=12):
+            ...     profiler.count('api_calls')
+            >>> profiler.write()
+            'userdata/profile/trace_20221017_093000.json'"""
+
+        self.lock = threading.Lock()
+        self.configure(enabled, path, capture, tool)
+
+    def configure(self,
+                  enabled: bool = True,
+                  path: str = 'userdata/profile',
+                  capture: str = None,
+                  tool: str = 'cprofile') -> 'Profiler':
+        """Resets the recorded stages and counters and applies the given settings, see __init__()."""
+
+        if tool not in ('cprofile', 'pyinstrument'):
+            raise ValueError(f"Unknown profiling tool '{tool}', use 'cprofile' or 'pyinstrument'.")
+
+        self.enabled = enabled
+        self.path = path
+        self.capture = capture
+        self.tool = tool
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = {}
+        self.profile = None                                             # cProfile accumulated over every captured occurrence
+        self.captures = 0
+        self.capturing = False
+
+        return self
+
+    def _us(self, seconds) -> float:
+        return (seconds - self.origin) * 1e6
+
+    def _event(self, event) -> None:
+        event.update(pid=os.getpid(), tid=threading.get_ident())
+        self.events.append(event)                                       # list.append is atomic, threads of the fetch pipeline record too
+
+    def stage(self, name: str, **args):
+        """Context manager timing one occurrence of a stage, the keyword arguments are stored with the event."""
+
+        return _Stage(self, name, args) if self.enabled else _null
+
+    def count(self, name: str, value=1) -> None:
+        """Adds value to a counter such as api_calls, bytes_fetched, bars_processed or paths_completed."""
+
+        if not self.enabled:
+            return
+
+        with self.lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+        self._event({'name': name, 'ph': 'C', 'ts': self._us(time.perf_counter()), 'args': {name: total}})
+
+    def _start_capture(self, name):
+        if name != self.capture or self.capturing or threading.current_thread() is not threading.main_thread():
+            return None
+
+        self.capturing = True
+        if self.tool == 'cprofile':
+            self.profile = self.profile or cProfile.Profile()
+            self.profile.enable()
+            return self.profile
+
+        from pyinstrument import Profiler as Instrument                # Optional dependency, only needed by this tool
+        instrument = Instrument()
+        instrument.start()
+        return instrument
+
+    def _stop_capture(self, capture) -> None:
+        if capture is None:
+            return
+
+        self.capturing = False
+        if self.tool == 'cprofile':
+            capture.disable()
+            return
+
+        capture.stop()
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, f'{self.capture}_{self.captures}.html'), 'w') as f:
+            f.write(capture.output_html())
+        self.captures += 1
+
+    def summary(self) -> dict:
+        """Total time and occurrences per stage name, with the counter totals."""
+
+        stages = {}
+        for event in self.events:
+            if event['ph'] == 'X':
+                stage = stages.setdefault(event['name'], {'count': 0, 'seconds': 0.0})
+                stage['count'] += 1
+                stage['seconds'] += event['dur'] / 1e6
+
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+    def write(self, path: str = None) -> str:
+        """Writes the recorded stages and counters as a Chrome trace JSON file, and the cProfile capture next to it.
+        Parameters:
+        path: str = None (Trace file, None writes trace_<timestamp>.json into self.path)
+        Returns the path of the trace file."""
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = path or os.path.join(self.path, f'trace_{stamp}.json')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}, f)
+        if self.profile is not None:
+            self.profile.dump_stats(os.path.join(os.path.dirname(path) or '.', f'{self.capture}_{stamp}.prof'))
+
+        return path
+
+
+def profiled(name: str):
+    """Decorator timing every call of a function as a stage of the shared profiler."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# Shared profiler of the process, enabled by the 'profile' entry of config.json or `python -m friday --profile`
+profiler = Profiler()
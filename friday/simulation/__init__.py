@@ -0,0 +1,4 @@
+from .aggregator import ResultAggregator
+from .report import density_heatmap, fan_chart
+from .risk import RiskMetrics, path_metrics
+from .runner import SimulationRunner, simulate_portfolio
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from friday.profiling import profiled
+
+
+class ResultAggregator:
+    """Streaming aggregator of simulation results. Consumes the curves of the paths chunk by chunk and keeps
+    running statistics per bar in fixed memory: mean and variance, quantile bands from per-bar histograms,
+    the distribution of the maximum drawdown and of the terminal value, and a uniform sample of whole curves."""
+
+    def __init__(self,
+                 quantiles=(0.05, 0.5, 0.95),
+                 returns: bool = True,
+                 bins: int = 4000,
+                 bounds=(-5.0, 5.0),
+                 drawdown_bins: int = 100,
+                 sample: int = 0,
+                 curves: str = None,
+                 seed: int = None) -> None:
+        """Initializes the aggregator, the memory used does not depend on the number of paths.
+        Parameters:
+        quantiles: tuple = (0.05, 0.5, 0.95) (Quantile bands reported by bands())
+        returns: bool = True (True for cumulative returns, False for prices)
+        bins: int = 4000 (Histogram bins per bar, the quantile resolution is (bounds[1] - bounds[0]) / bins in log space)
+        bounds: tuple = (-5.0, 5.0) (Log range of the histograms relative to 1 + return or to the first price)
+        drawdown_bins: int = 100
+        sample: int = 0 (Number of whole curves kept, drawn uniformly from every path seen)
+        curves: str = None (Directory every curve is written to chunk by chunk, None keeps none)
+        seed: int = None (Seed of the curve sample)
+        Usage:
+            >>> agg = ResultAggregator(sample=20)
+            >>> for cum_returns in chunks:
+            ...     agg.update(cum_returns)
+            >>> agg.bands()"""
+
+        self.quantiles = quantiles
+        self.returns = returns
+        self.bins = bins
+        self.bounds = bounds
+        self.width = (bounds[1] - bounds[0]) / bins
+        self.drawdown_bins = drawdown_bins
+        self.sample = sample
+        self.curves = curves
+        self.rng = np.random.default_rng(seed)
+        self.index = None
+        self.count = 0
+
+    def _init(self, values) -> None:
+        days = len(values)
+        self.index = values.index
+        self.scale = 1.0 if self.returns else float(np.nanmean(values.values[0]))    # Prices are binned relative to the first bar
+        self.mean = np.zeros(days)
+        self.m2 = np.zeros(days)
+        self.min = np.full(days, np.inf)
+        self.max = np.full(days, -np.inf)
+        self.counts = np.zeros((days, self.bins), dtype=np.int64)
+        self.drawdown_counts = np.zeros(self.drawdown_bins, dtype=np.int64)
+        self.losses = 0                                                 # Paths ending below their starting value
+        self.samples = np.empty((days, self.sample))
+        self.sample_ids = [None] * self.sample
+        if self.curves:
+            os.makedirs(self.curves, exist_ok=True)
+
+    def _equity(self, values):
+        return 1 + values if self.returns else values / self.scale
+
+    def _value(self, log_equity):
+        equity = np.exp(log_equity)
+        return equity - 1 if self.returns else equity * self.scale
+
+    @profiled('aggregate.update')
+    def update(self, values: pd.DataFrame) -> None:
+        """Adds a chunk of paths.
+        Parameters:
+        values: pd.DataFrame (Cumulative returns or prices, one column per path, bars on the index)"""
+
+        if self.index is None:
+            self._init(values)
+        data = values.values.astype(np.float64)
+        days, n = data.shape
+
+        # Mean and variance, chunks are merged with Chan's parallel update
+        chunk_mean = data.mean(axis=1)
+        chunk_m2 = ((data - chunk_mean[:, None]) ** 2).sum(axis=1)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + chunk_m2 + delta ** 2 * self.count * n / total
+        self.min = np.minimum(self.min, data.min(axis=1))
+        self.max = np.maximum(self.max, data.max(axis=1))
+
+        # Per-bar histograms in log space, flattened so a single bincount updates every bar
+        equity = self._equity(data)
+        position = np.floor((np.log(np.maximum(equity, 1e-300)) - self.bounds[0]) / self.width).astype(np.int64)
+        position = np.clip(position, 0, self.bins - 1) + np.arange(days)[:, None] * self.bins
+        self.counts += np.bincount(position.ravel(), minlength=days * self.bins).reshape(days, self.bins)
+
+        # Maximum drawdown of every path
+        drawdown = 1 - equity / np.maximum.accumulate(equity, axis=0)
+        position = np.minimum((drawdown.max(axis=0) * self.drawdown_bins).astype(np.int64), self.drawdown_bins - 1)
+        self.drawdown_counts += np.bincount(position, minlength=self.drawdown_bins)
+        self.losses += int((equity[-1] < 1).sum()) if self.returns else 0
+
+        self._sample(values, data)
+        if self.curves:
+            np.savez(os.path.join(self.curves, f'curves_{self.count:09d}.npz'), paths=np.asarray(values.columns), values=data)
+
+        self.count = total
+
+    def _sample(self, values, data) -> None:
+        """Reservoir sampling, every path seen so far is kept with the same probability."""
+
+        seen = self.count + np.arange(data.shape[1])
+        slots = np.where(seen < self.sample, seen, self.rng.integers(0, seen + 1))
+        for column in np.flatnonzero(slots < self.sample):
+            self.samples[:, slots[column]] = data[:, column]
+            self.sample_ids[slots[column]] = values.columns[column]
+
+    def quantile(self, q: float, counts=None) -> np.ndarray:
+        """Estimates a quantile per bar from the histograms, interpolating linearly inside the bin."""
+
+        counts = self.counts if counts is None else counts
+        cumulative = np.cumsum(counts, axis=-1)
+        rank = q * cumulative[..., -1:]
+        position = np.minimum((cumulative < rank).sum(axis=-1), self.bins - 1)
+        above = np.take_along_axis(cumulative, position[..., None], axis=-1)[..., 0]
+        inside = np.take_along_axis(counts, position[..., None], axis=-1)[..., 0]
+        fraction = np.where(inside > 0, 1 - (above - rank[..., 0]) / np.maximum(inside, 1), 0.5)
+
+        return self._value(self.bounds[0] + (position + fraction) * self.width)
+
+    def bands(self) -> pd.DataFrame:
+        """Returns the mean, standard deviation, extremes and quantile bands of every bar."""
+
+        bands = {'mean': self.mean, 'std': np.sqrt(self.m2 / max(self.count - 1, 1)), 'min': self.min, 'max': self.max}
+        for q in self.quantiles:
+            bands[f'p{q * 100:g}'] = np.clip(self.quantile(q), self.min, self.max)
+
+        return pd.DataFrame(bands, index=self.index)
+
+    def terminal_histogram(self, merge: int = 40) -> pd.Series:
+        """Distribution of the terminal value, merge neighbouring log bins to coarsen the histogram.
+        Returns the path counts indexed by the lower edge of their bin."""
+
+        counts = self.counts[-1].reshape(-1, merge).sum(axis=1)
+        edges = self._value(self.bounds[0] + np.arange(len(counts)) * self.width * merge)
+        nonzero = np.flatnonzero(counts)
+        keep = slice(nonzero[0], nonzero[-1] + 1) if len(nonzero) else slice(0, 0)
+
+        return pd.Series(counts[keep], index=edges[keep], name='paths')
+
+    def density(self, merge: int = 20) -> pd.DataFrame:
+        """Share of the paths per value bin and bar, merge neighbouring log bins to coarsen the grid.
+        Returns the bins seen by any path as rows, indexed by their center value, and the bars as columns."""
+
+        counts = self.counts.reshape(len(self.counts), -1, merge).sum(axis=2)
+        centers = self._value(self.bounds[0] + (np.arange(counts.shape[1]) + 0.5) * self.width * merge)
+        nonzero = np.flatnonzero(counts.sum(axis=0))
+        keep = slice(nonzero[0], nonzero[-1] + 1) if len(nonzero) else slice(0, 0)
+
+        return pd.DataFrame((counts / np.maximum(counts.sum(axis=1, keepdims=True), 1))[:, keep].T,
+                            index=centers[keep], columns=self.index)
+
+    def drawdown_histogram(self) -> pd.Series:
+        """Distribution of the maximum drawdown of the paths, indexed by the lower edge of their bin."""
+
+        return pd.Series(self.drawdown_counts, index=np.arange(self.drawdown_bins) / self.drawdown_bins, name='paths')
+
+    def sampled(self) -> pd.DataFrame:
+        """Returns the sampled curves with their path ids as columns."""
+
+        kept = min(self.sample, self.count)
+        return pd.DataFrame(self.samples[:, :kept], index=self.index, columns=self.sample_ids[:kept])
+
+    def summary(self) -> pd.Series:
+        """Terminal and drawdown statistics over every path."""
+
+        drawdown = np.arange(self.drawdown_bins) / self.drawdown_bins + 0.5 / self.drawdown_bins
+        cumulative = np.cumsum(self.drawdown_counts)
+        summary = {
+            'paths': self.count,
+            'terminal_mean': self.mean[-1],
+            'terminal_std': np.sqrt(self.m2[-1] / max(self.count - 1, 1)),
+            'terminal_min': self.min[-1],
+            'terminal_max': self.max[-1],
+            **{f'terminal_p{q * 100:g}': self.quantile(q, self.counts[-1]) for q in self.quantiles},
+            'max_drawdown_mean': (drawdown * self.drawdown_counts).sum() / max(self.count, 1),
+            **{f'max_drawdown_p{q * 100:g}': drawdown[min(np.searchsorted(cumulative, q * self.count), self.drawdown_bins - 1)]
+               for q in self.quantiles}
+        }
+        if self.returns:
+            summary['probability_of_loss'] = self.losses / max(self.count, 1)
+
+        return pd.Series(summary, name='summary')
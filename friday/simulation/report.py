@@ -0,0 +1,58 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from friday.profiling import profiled
+
+
+@profiled('report.fan_chart')
+def fan_chart(aggregator,
+              title: str,
+              bands=((0.05, 0.95), (0.25, 0.75)),
+              highlight: int = 5):
+    """Percentile fan chart of aggregated simulation results, its size does not depend on the number of paths.
+    Parameters:
+    aggregator: friday.simulation.ResultAggregator
+    title: str
+    bands: tuple = ((0.05, 0.95), (0.25, 0.75)) (Quantile pairs drawn as shaded bands, widest first)
+    highlight: int = 5 (Sampled paths drawn on top of the bands, at most the sample kept by the aggregator)
+    Returns a plotly Figure."""
+
+    index = aggregator.index
+    fig = go.Figure()
+
+    for x, (low, high) in enumerate(bands):
+        opacity = 0.15 + 0.15 * x                                       # Inner bands are drawn darker
+        lower = np.clip(aggregator.quantile(low), aggregator.min, aggregator.max)
+        upper = np.clip(aggregator.quantile(high), aggregator.min, aggregator.max)
+        fig.add_trace(go.Scatter(x=index, y=upper, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=index, y=lower, mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor=f'rgba(31, 119, 180, {opacity})', name=f'P{low * 100:g} - P{high * 100:g}'))
+
+    median = np.clip(aggregator.quantile(0.5), aggregator.min, aggregator.max)
+    fig.add_trace(go.Scatter(x=index, y=median, mode='lines', line=dict(color='rgb(31, 119, 180)', width=2), name='Median'))
+    fig.add_trace(go.Scatter(x=index, y=aggregator.mean, mode='lines', line=dict(color='black', width=1, dash='dot'), name='Mean'))
+
+    sampled = aggregator.sampled()
+    for path in sampled.columns[:highlight]:
+        fig.add_trace(go.Scatter(x=index, y=sampled[path], mode='lines', line=dict(width=1), opacity=0.6, name=f'Path {path}'))
+
+    fig.update_layout(title=f'{title} ({aggregator.count} simulations)', hovermode='x unified')
+
+    return fig
+
+
+@profiled('report.density_heatmap')
+def density_heatmap(aggregator, title: str, merge: int = 20):
+    """Heatmap of the share of simulations per value and bar, built from the aggregated histograms.
+    Parameters:
+    aggregator: friday.simulation.ResultAggregator
+    title: str
+    merge: int = 20 (Neighbouring histogram bins merged per heatmap row)
+    Returns a plotly Figure."""
+
+    density = aggregator.density(merge)
+    fig = go.Figure(go.Heatmap(x=density.columns, y=density.index, z=density.values,
+                               colorscale='Blues', colorbar=dict(title='Share')))
+    fig.update_layout(title=f'{title} ({aggregator.count} simulations)')
+
+    return fig
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from friday.profiling import profiled
+
+
+@njit(cache=True)
+def drawdown_nb(equity, ruin):
+    """Drawdown statistics of every path in one pass over the bars.
+    Parameters:
+    equity: np.ndarray (Equity relative to the initial value with shape (bars, paths), the peak starts at 1)
+    ruin: float (Equity at or below which a path is ruined)
+    Returns the maximum drawdown, the longest drawdown in bars, the share of bars under water and
+    whether the path was ruined, each with shape (paths,)."""
+
+    n_bars, n_paths = equity.shape
+    peak = np.ones(n_paths)
+    max_drawdown = np.zeros(n_paths)
+    duration = np.zeros(n_paths, dtype=np.int64)                # Bars since the last peak
+    max_duration = np.zeros(n_paths, dtype=np.int64)
+    under_water = np.zeros(n_paths, dtype=np.int64)
+    ruined = np.zeros(n_paths, dtype=np.bool_)
+
+    for i in range(n_bars):
+        for path in range(n_paths):                             # Paths on the inner loop follow the memory layout
+            value = equity[i, path]
+            if np.isnan(value):
+                continue
+            if value >= peak[path]:
+                peak[path] = value
+                duration[path] = 0
+                continue
+            drawdown = 1 - value / peak[path]
+            if drawdown > max_drawdown[path]:
+                max_drawdown[path] = drawdown
+            duration[path] += 1
+            if duration[path] > max_duration[path]:
+                max_duration[path] = duration[path]
+            under_water[path] += 1
+            if value <= ruin:
+                ruined[path] = True
+
+    return max_drawdown, max_duration, under_water / max(n_bars, 1), ruined
+
+
+def path_metrics(equity, ruin: float = 0.5) -> pd.DataFrame:
+    """Risk metrics of every path of an equity matrix.
+    Parameters:
+    equity: pd.DataFrame or np.ndarray (Equity relative to the initial value, one column per path, bars on the index)
+    ruin: float = 0.5 (Equity at or below which a path is ruined, 0.5 is a loss of half the initial value)
+    Returns the terminal return, maximum drawdown, longest drawdown in bars, share of bars under water and
+    ruin of every path, indexed by path."""
+
+    columns = equity.columns if isinstance(equity, pd.DataFrame) else None
+    values = np.ascontiguousarray(equity, dtype=np.float64)
+    max_drawdown, duration, under_water, ruined = drawdown_nb(values, ruin)
+
+    return pd.DataFrame({
+        'terminal_return': values[-1] - 1,
+        'max_drawdown': max_drawdown,
+        'drawdown_duration': duration,
+        'time_under_water': under_water,
+        'ruined': ruined
+    }, index=columns)
+
+
+class RiskMetrics:
+    """Risk metrics of simulation results. Consumes the curves of the paths chunk by chunk like
+    friday.simulation.ResultAggregator and keeps a few values per path instead of the curves, from which
+    terminal return quantiles, value at risk, expected shortfall, drawdown distributions and the
+    probability of ruin are computed over every path at once."""
+
+    def __init__(self,
+                 levels=(0.95, 0.99),
+                 quantiles=(0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99),
+                 ruin: float = 0.5,
+                 returns: bool = True) -> None:
+        """Initializes empty metrics.
+        Parameters:
+        levels: tuple = (0.95, 0.99) (Confidence levels of the value at risk and expected shortfall)
+        quantiles: tuple = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99) (Terminal return quantiles)
+        ruin: float = 0.5 (Equity relative to the initial value at or below which a path is ruined)
+        returns: bool = True (True for cumulative returns, False for prices or portfolio values)
+        Usage:
+            >>> risk = RiskMetrics(**config.get('risk', {}))
+            >>> for cum_returns in chunks:
+            ...     risk.update(cum_returns)
+            >>> risk.summary()"""
+
+        self.levels = levels
+        self.quantiles = quantiles
+        self.ruin = ruin
+        self.returns = returns
+        self.chunks = []
+
+    @profiled('risk.update')
+    def update(self, values: pd.DataFrame) -> None:
+        """Adds a chunk of paths.
+        Parameters:
+        values: pd.DataFrame (Cumulative returns or prices, one column per path, bars on the index)"""
+
+        data = values.values.astype(np.float64)
+        equity = 1 + data if self.returns else data / data[0]
+        self.chunks.append(path_metrics(pd.DataFrame(equity, columns=values.columns), self.ruin))
+
+    @property
+    def count(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def paths(self) -> pd.DataFrame:
+        """Metrics of every path seen, indexed by path."""
+
+        if len(self.chunks) > 1:                                        # Merged once, later calls reuse the result
+            self.chunks = [pd.concat(self.chunks)]
+        return self.chunks[0] if self.chunks else path_metrics(np.ones((1, 0)), self.ruin)
+
+    def var(self, level: float = 0.95) -> float:
+        """Value at risk of the terminal return, the loss not exceeded with the given confidence."""
+
+        return -np.quantile(self.paths()['terminal_return'].values, 1 - level)
+
+    def cvar(self, level: float = 0.95) -> float:
+        """Expected shortfall of the terminal return, the mean loss of the paths at or beyond the value at risk."""
+
+        terminal = self.paths()['terminal_return'].values
+        return -terminal[terminal <= np.quantile(terminal, 1 - level)].mean()
+
+    def summary(self) -> pd.Series:
+        """Terminal return, tail risk, drawdown and ruin statistics over every path."""
+
+        paths = self.paths()
+        terminal = paths['terminal_return'].values
+        drawdown = paths['max_drawdown'].values
+        duration = paths['drawdown_duration'].values
+        summary = {
+            'paths': len(paths),
+            'terminal_mean': terminal.mean(),
+            **{f'terminal_p{q * 100:g}': value for q, value in zip(self.quantiles, np.quantile(terminal, self.quantiles))},
+            **{f'var_{level * 100:g}': self.var(level) for level in self.levels},
+            **{f'cvar_{level * 100:g}': self.cvar(level) for level in self.levels},
+            'max_drawdown_mean': drawdown.mean(),
+            'max_drawdown_p50': np.median(drawdown),
+            'max_drawdown_p95': np.quantile(drawdown, 0.95),
+            'max_drawdown_worst': drawdown.max(),
+            'worst_drawdown_path': paths.index[drawdown.argmax()],
+            'drawdown_duration_mean': duration.mean(),
+            'drawdown_duration_p95': np.quantile(duration, 0.95),
+            'drawdown_duration_max': duration.max(),
+            'time_under_water_mean': paths['time_under_water'].mean(),
+            'probability_of_loss': (terminal < 0).mean(),
+            'probability_of_ruin': paths['ruined'].mean()
+        }
+
+        return pd.Series(summary, name='risk')
@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import vectorbt as vbt
+
+from friday.data import growth_matrix, project_prices
+from friday.profiling import profiled, profiler
+from friday.strategies import Strategy
+from friday.utils import (bootstrap_indices, get_active_dates,
+                          get_future_dates)
+
+from .aggregator import ResultAggregator
+from .risk import RiskMetrics
+
+# Read-only state of a worker process, set once by _init_worker
+_worker = {}
+
+
+@profiled('portfolio.from_signals')
+def simulate_portfolio(data, entries, exits, init_cash: float = 100000, group_by: str = 'path'):
+    """Runs the rotation portfolio of every path in data as one vectorbt Portfolio grouped by path.
+    Parameters:
+    data: pd.DataFrame (Close prices with (path, symbol) MultiIndex columns)
+    entries, exits: pd.DataFrame (Boolean signals aligned with data, see Strategy.strategy_batch() or PathSet.frames())
+    init_cash: float = 100000
+    group_by: str = 'path' (Column level holding one portfolio per value)"""
+
+    return vbt.Portfolio.from_signals(
+        close=data,
+        entries=entries,
+        exits=exits,
+        price=data,
+        cash_sharing=True,
+        val_price=data.vbt.fshift(1),
+        slippage=0.0,       # set slippage
+        init_cash=init_cash,
+        group_by=group_by,  # one group per simulation
+        call_seq='auto',
+        freq='d')
+
+
+def _init_worker(path, index, symbols, future_index, window_rows, loc, config, days, bootstrap):
+    """Maps the shared history read-only and keeps the small simulation parameters for every later task."""
+
+    _worker['history'] = np.load(os.path.join(path, 'history.npy'), mmap_mode='r')
+    _worker['growth'] = growth_matrix(_worker['history'])                   # Daily growth factors computed once per worker
+    _worker['index'] = index
+    _worker['symbols'] = symbols
+    _worker['future_index'] = future_index
+    _worker['window_rows'] = window_rows
+    _worker['loc'] = loc
+    _worker['strategy'] = Strategy(config)
+    _worker['engine'] = _worker['strategy'].indicator_engine(_worker['history'])   # Historical indicator state, shared by every path of the worker
+    _worker['days'] = days
+    _worker['bootstrap'] = bootstrap
+
+
+def _run_paths(path_ids, seeds):
+    """Projects, evaluates and simulates a chunk of paths inside a worker.
+    Returns the cumulative returns and SPY prices with shape (days, paths)."""
+
+    history = _worker['history']
+    size = len(_worker['future_index'])
+
+    # Every path draws from its own generator, results do not depend on how paths are split across workers
+    positions = np.concatenate([bootstrap_indices(1, _worker['loc'], size, rng=seed, **_worker['bootstrap']) for seed in seeds], axis=1)
+    future = project_prices(history, _worker['window_rows'][positions], _worker['growth'])
+
+    close = pd.DataFrame(history, index=_worker['index'], columns=_worker['symbols'])
+    paths = _worker['strategy'].signal_paths(close, future, _worker['future_index'], _worker['days'],
+                                             engine=_worker['engine'], path_ids=path_ids)
+    pf = simulate_portfolio(*paths.frames())
+
+    return pf.cumulative_returns().values, paths.symbol('SPY')
+
+
+def _timed(chunks, results):
+    """Pairs every chunk with its result, timing the wait for each as a simulation.chunk stage."""
+
+    results = iter(results)
+    for chunk in chunks:
+        with profiler.stage('simulation.chunk', paths=len(chunk)):
+            result = next(results)
+        profiler.count('paths_completed', len(chunk))
+        yield chunk, result
+
+
+class SimulationRunner:
+    """Parallel simulation runner for Friday. Spreads the future simulations across a process pool."""
+
+    def __init__(self,
+                 synthesizer,
+                 config,
+                 workers: int = None,
+                 chunk_size: int = 256,
+                 seed: int = None) -> None:
+        """Initializes the runner.
+        Parameters:
+        synthesizer: friday.data.Synthesizer (Provides the history and the simulation window)
+        config: Configuration file for various predefined data attributes.
+        workers: int = None (Number of worker processes, None uses every core and 1 runs in the current process)
+        chunk_size: int = 256 (Paths simulated per task)
+        seed: int = None (Master seed, the same seed gives identical results for any worker count)
+        Usage:
+            >>> runner = SimulationRunner(s, config, workers=8, seed=42)
+            >>> cum_returns, spy_plot = runner.run(10000)"""
+
+        self.synthesizer = synthesizer
+        self.config = config
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+    def stream(self, paths: int):
+        """Runs the given number of future simulations and yields their results chunk by chunk, in path order.
+        Yields the cumulative returns and SPY prices of every chunk with one column per path."""
+
+        s = self.synthesizer
+        close = s.close_history()
+        future_index = get_future_dates(s.start, s.simulation_end)
+        active_days = get_active_dates(s.start, s.end)
+        loc = active_days.get_loc(s.end)                                    # Returns are drawn from sessions 1 ... loc-1, see friday.utils.random_
+        window_rows = close.index.get_indexer(active_days)
+        if (window_rows < 0).any():                                         # Workers would silently draw from wrong rows
+            missing = active_days[window_rows < 0]
+            raise ValueError(f"Sessions {[str(day.date()) for day in missing]} are missing from the close history.")
+        index = close.index.append(pd.Index(future_index))[-s.days:]
+
+        seeds = np.random.SeedSequence(self.seed).spawn(paths)              # One independent stream per path
+        chunks = [range(x, min(x + self.chunk_size, paths)) for x in range(0, paths, self.chunk_size)]
+
+        # The history is written once and mapped read-only by every worker instead of being pickled per task
+        path = tempfile.mkdtemp(prefix='friday_')
+        np.save(os.path.join(path, 'history.npy'), np.ascontiguousarray(close.values))
+        initargs = (path, close.index, close.columns, future_index, window_rows, loc, self.config, s.days, s.bootstrap)
+
+        try:
+            if self.workers == 1:
+                _init_worker(*initargs)
+                results = (_run_paths(chunk, seeds[chunk.start:chunk.stop]) for chunk in chunks)
+                for chunk, (cum_returns, spy) in _timed(chunks, results):
+                    yield pd.DataFrame(cum_returns, index=index, columns=chunk), pd.DataFrame(spy, index=index, columns=chunk)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=initargs) as executor:
+                    results = executor.map(_run_paths, chunks, [seeds[chunk.start:chunk.stop] for chunk in chunks])
+                    for chunk, (cum_returns, spy) in _timed(chunks, results):
+                        yield pd.DataFrame(cum_returns, index=index, columns=chunk), pd.DataFrame(spy, index=index, columns=chunk)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def run(self, paths: int):
+        """Runs the given number of future simulations.
+        Returns the cumulative returns and SPY prices with one column per path."""
+
+        results = list(self.stream(paths))
+        cum_returns = pd.concat([r[0] for r in results], axis=1)
+        spy_plot = pd.concat([r[1] for r in results], axis=1)
+
+        return cum_returns, spy_plot
+
+    def aggregate(self, paths: int, returns: ResultAggregator = None, spy: ResultAggregator = None, risk: RiskMetrics = None):
+        """Runs the given number of future simulations, streaming every chunk into fixed-memory aggregators
+        instead of keeping every path. See friday.simulation.aggregator
+        risk: RiskMetrics = None (Also receives the cumulative returns of every chunk when given, see friday.simulation.risk)
+        Returns the aggregators of the cumulative returns and SPY prices."""
+
+        returns = ResultAggregator() if returns is None else returns
+        spy = ResultAggregator(returns=False) if spy is None else spy
+        for cum_returns, spy_plot in self.stream(paths):
+            returns.update(cum_returns)
+            spy.update(spy_plot)
+            if risk is not None:
+                risk.update(cum_returns)
+
+        return returns, spy
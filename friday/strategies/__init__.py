@@ -1 +1,6 @@
-from .strategy import Strategy
\ No newline at end of file
+from .indicators import IndicatorEngine
+from .live import LiveEvaluator
+from .rules import DEFAULT_RULES, compile_rules
+from .signals import generate_signals, generate_signals_nb
+from .strategy import Strategy
+from .universe import UniverseStrategy
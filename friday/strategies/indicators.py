@@ -0,0 +1,335 @@
+"""Incremental indicator utilities for Friday."""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def ma_nb(close, window):
+    """Simple moving average of every column, same recurrence as vectorbt's rolling mean so results match vbt.MA.
+    Returns the moving average with the running sum and NaN count of every bar, which is the state needed to extend it."""
+
+    n_bars, n_cols = close.shape
+    out = np.empty((n_bars, n_cols))
+    cumsum_arr = np.zeros((n_bars, n_cols))
+    nancnt_arr = np.zeros((n_bars, n_cols))
+
+    for col in range(n_cols):
+        cumsum = 0.
+        nancnt = 0.
+        for i in range(n_bars):
+            if np.isnan(close[i, col]):
+                nancnt = nancnt + 1
+            else:
+                cumsum = cumsum + close[i, col]
+            nancnt_arr[i, col] = nancnt
+            cumsum_arr[i, col] = cumsum
+            if i < window:
+                window_len = i + 1 - nancnt
+                window_cumsum = cumsum
+            else:
+                window_len = window - (nancnt - nancnt_arr[i - window, col])
+                window_cumsum = cumsum - cumsum_arr[i - window, col]
+            out[i, col] = np.nan if window_len < window else window_cumsum / window_len
+
+    return out, cumsum_arr, nancnt_arr
+
+
+@njit(cache=True)
+def ma_extend_nb(future, cumsum_tail, nancnt_tail, window):
+    """Extends a moving average over projected bars of many paths.
+    Parameters:
+    future: np.ndarray (Projected closes with shape (days, paths, symbols))
+    cumsum_tail, nancnt_tail: np.ndarray (State of the last `window` historical bars, shape (window, symbols))
+    window: int"""
+
+    n_days, n_paths, n_cols = future.shape
+    out = np.empty((n_days, n_paths, n_cols))
+    cumsum_arr = np.empty(window + n_days)
+    nancnt_arr = np.empty(window + n_days)
+
+    for path in range(n_paths):
+        for col in range(n_cols):
+            cumsum_arr[:window] = cumsum_tail[:, col]
+            nancnt_arr[:window] = nancnt_tail[:, col]
+            cumsum = cumsum_tail[-1, col]
+            nancnt = nancnt_tail[-1, col]
+            for i in range(n_days):
+                if np.isnan(future[i, path, col]):
+                    nancnt = nancnt + 1
+                else:
+                    cumsum = cumsum + future[i, path, col]
+                cumsum_arr[window + i] = cumsum
+                nancnt_arr[window + i] = nancnt
+                window_len = window - (nancnt - nancnt_arr[i])
+                window_cumsum = cumsum - cumsum_arr[i]
+                out[i, path, col] = np.nan if window_len < window else window_cumsum / window_len
+
+    return out
+
+
+@njit(cache=True)
+def ma_chunk_nb(close, cumsum_ring, nancnt_ring, cumsum, nancnt, counter, window):
+    """Advances a moving average over a chunk of bars, same recurrence as ma_nb so a run split into chunks
+    matches the in-memory one. The rings hold the running sum and NaN count of the last `window` bars,
+    counter[0] the number of bars seen so far. Updates the state in place and returns the moving average of every bar."""
+
+    n_bars, n_cols = close.shape
+    out = np.empty((n_bars, n_cols))
+
+    for i in range(n_bars):
+        pos = counter[0] % window                               # Ring slot of the bar `window` bars ago
+        for col in range(n_cols):
+            if np.isnan(close[i, col]):
+                nancnt[col] = nancnt[col] + 1
+            else:
+                cumsum[col] = cumsum[col] + close[i, col]
+            if counter[0] < window:
+                window_len = counter[0] + 1 - nancnt[col]
+                window_cumsum = cumsum[col]
+            else:
+                window_len = window - (nancnt[col] - nancnt_ring[pos, col])
+                window_cumsum = cumsum[col] - cumsum_ring[pos, col]
+            out[i, col] = np.nan if window_len < window else window_cumsum / window_len
+            cumsum_ring[pos, col] = cumsum[col]
+            nancnt_ring[pos, col] = nancnt[col]
+        counter[0] += 1
+
+    return out
+
+
+@njit(cache=True)
+def _rsi_value_nb(gain, loss):
+    total = gain + loss
+    if -0.00000001 < total < 0.00000001:
+        return 0.
+    return 100. * (gain / total)
+
+
+@njit(cache=True)
+def rsi_nb(close, period):
+    """Relative Strength Index of every column with Wilder smoothing, same recurrence as TA-Lib's RSI.
+    Returns the RSI with the last close, average gain and average loss of every column, which is the state needed to extend it."""
+
+    n_bars, n_cols = close.shape
+    inv_period = 1. / period                                    # TA-Lib averages by multiplying with the reciprocal
+    out = np.full((n_bars, n_cols), np.nan)
+    last = np.full(n_cols, np.nan)
+    gains = np.full(n_cols, np.nan)
+    losses = np.full(n_cols, np.nan)
+
+    for col in range(n_cols):
+        begin = 0
+        while begin < n_bars and np.isnan(close[begin, col]):   # Leading NaNs are skipped like TA-Lib does
+            begin += 1
+        if n_bars - begin <= period:
+            continue
+
+        prev = close[begin, col]
+        gain = 0.
+        loss = 0.
+        for i in range(begin + 1, begin + period + 1):          # Seed with the simple average of the first changes
+            diff = close[i, col] - prev
+            prev = close[i, col]
+            if diff < 0:
+                loss -= diff
+            else:
+                gain += diff
+        loss *= inv_period
+        gain *= inv_period
+        out[begin + period, col] = _rsi_value_nb(gain, loss)
+
+        for i in range(begin + period + 1, n_bars):
+            diff = close[i, col] - prev
+            prev = close[i, col]
+            loss *= (period - 1)
+            gain *= (period - 1)
+            if diff < 0:
+                loss -= diff
+            else:
+                gain += diff
+            loss *= inv_period
+            gain *= inv_period
+            out[i, col] = _rsi_value_nb(gain, loss)
+
+        last[col] = prev
+        gains[col] = gain
+        losses[col] = loss
+
+    return out, last, gains, losses
+
+
+@njit(cache=True)
+def rsi_chunk_nb(close, last, gains, losses, seen, period):
+    """Advances a Relative Strength Index over a chunk of bars, same recurrence as rsi_nb including the leading NaNs
+    and the simple average seeding the first `period` changes, so a run split into chunks matches the in-memory one.
+    seen holds the changes taken per column, -1 before the first valid close.
+    Updates the state in place and returns the RSI of every bar."""
+
+    n_bars, n_cols = close.shape
+    inv_period = 1. / period
+    out = np.full((n_bars, n_cols), np.nan)
+
+    for col in range(n_cols):
+        for i in range(n_bars):
+            if seen[col] < 0:                                   # Leading NaNs are skipped like TA-Lib does
+                if not np.isnan(close[i, col]):
+                    last[col] = close[i, col]
+                    gains[col] = 0.
+                    losses[col] = 0.
+                    seen[col] = 0
+                continue
+
+            diff = close[i, col] - last[col]
+            last[col] = close[i, col]
+            if seen[col] < period:                              # Seed with the simple average of the first changes
+                if diff < 0:
+                    losses[col] -= diff
+                else:
+                    gains[col] += diff
+                seen[col] += 1
+                if seen[col] == period:
+                    losses[col] *= inv_period
+                    gains[col] *= inv_period
+                    out[i, col] = _rsi_value_nb(gains[col], losses[col])
+                continue
+
+            losses[col] *= (period - 1)
+            gains[col] *= (period - 1)
+            if diff < 0:
+                losses[col] -= diff
+            else:
+                gains[col] += diff
+            losses[col] *= inv_period
+            gains[col] *= inv_period
+            out[i, col] = _rsi_value_nb(gains[col], losses[col])
+
+    return out
+
+
+@njit(cache=True)
+def rsi_extend_nb(future, last, gains, losses, period):
+    """Extends a Relative Strength Index over projected bars of many paths.
+    Parameters:
+    future: np.ndarray (Projected closes with shape (days, paths, symbols))
+    last, gains, losses: np.ndarray (State at the end of the history, shape (symbols,))
+    period: int"""
+
+    n_days, n_paths, n_cols = future.shape
+    inv_period = 1. / period
+    out = np.empty((n_days, n_paths, n_cols))
+
+    for path in range(n_paths):
+        for col in range(n_cols):
+            prev = last[col]
+            gain = gains[col]
+            loss = losses[col]
+            for i in range(n_days):
+                diff = future[i, path, col] - prev
+                prev = future[i, path, col]
+                loss *= (period - 1)
+                gain *= (period - 1)
+                if diff < 0:
+                    loss -= diff
+                else:
+                    gain += diff
+                loss *= inv_period
+                gain *= inv_period
+                out[i, path, col] = _rsi_value_nb(gain, loss)
+
+    return out
+
+
+class IndicatorEngine:
+    """Incremental indicator engine. Computes the moving averages and RSI over the shared history once and keeps
+    their state where the history ends, so every synthetic path only extends the indicators over its projected bars."""
+
+    def __init__(self,
+                 close,
+                 ma_windows=(20, 200),
+                 rsi_period: int = 10) -> None:
+        """Computes the historical indicators and their state.
+        Parameters:
+        close: np.ndarray (Historical closing prices, shape (sessions, symbols))
+        ma_windows: tuple = (20, 200)
+        rsi_period: int = 10
+        Usage:
+            >>> engine = IndicatorEngine(close.values)
+            >>> ma, rsi = engine.extend(future, days=15)"""
+
+        self.close = np.asarray(close, dtype=np.float64)
+        self.ma_windows = ma_windows
+        self.rsi_period = rsi_period
+
+        if len(self.close) < max(ma_windows):
+            raise ValueError(f"History of {len(self.close)} bars is shorter than the highest window {max(ma_windows)}.")
+
+        self.ma = {}
+        self.ma_state = {}
+        for window in ma_windows:
+            ma, cumsum_arr, nancnt_arr = ma_nb(self.close, window)
+            self.ma[window] = ma
+            self.ma_state[window] = (cumsum_arr[-window:].copy(), nancnt_arr[-window:].copy())
+
+        self.rsi, *self.rsi_state = rsi_nb(self.close, rsi_period)
+
+    def extend(self, future, days: int):
+        """Extends the indicators over projected paths and returns the last `days` bars of history and projection.
+        Parameters:
+        future: np.ndarray (Projected closes with shape (future days, paths, symbols))
+        days: int
+        Returns the moving averages as a dict keyed by window and the RSI, each with shape (days, paths, symbols)."""
+
+        future = np.asarray(future, dtype=np.float64)
+        ma = {window: self.tail(self.ma[window], ma_extend_nb(future, *self.ma_state[window], window), days)
+              for window in self.ma_windows}
+        rsi = self.tail(self.rsi, rsi_extend_nb(future, *self.rsi_state, self.rsi_period), days)
+
+        return ma, rsi
+
+    def tail(self, history, future, days):
+        """Last `days` bars of the history followed by the projection, history is shared by every path."""
+
+        if days <= len(future):
+            return future[len(future) - days:]
+        history = np.broadcast_to(history[len(history) - (days - len(future)):, None, :],
+                                  (days - len(future),) + future.shape[1:])
+        return np.concatenate([history, future])
+
+
+class ChunkedIndicators:
+    """Moving averages and RSI carried across chunks of bars. Every chunk continues the state left by the previous
+    one, so the indicators of a history streamed chunk by chunk equal the ones computed over it in memory while
+    only the last `window` bars of state are kept."""
+
+    def __init__(self,
+                 n_cols: int,
+                 ma_windows=(20, 200),
+                 rsi_period: int = 10) -> None:
+        """Initializes empty state, see update().
+        Parameters:
+        n_cols: int (Number of symbols)
+        ma_windows: tuple = (20, 200)
+        rsi_period: int = 10
+        Usage:
+            >>> indicators = ChunkedIndicators(len(symbols))
+            >>> for chunk in chunks:
+            ...     ma, rsi = indicators.update(chunk.values)"""
+
+        self.ma_windows = ma_windows
+        self.rsi_period = rsi_period
+        self.ma_state = {window: (np.zeros((window, n_cols)), np.zeros((window, n_cols)),
+                                  np.zeros(n_cols), np.zeros(n_cols), np.zeros(1, dtype=np.int64))
+                         for window in ma_windows}
+        self.rsi_state = (np.full(n_cols, np.nan), np.full(n_cols, np.nan), np.full(n_cols, np.nan),
+                          np.full(n_cols, -1, dtype=np.int64))
+
+    def update(self, close):
+        """Advances the indicators over the next chunk of closes with shape (bars, symbols).
+        Returns the moving averages as a dict keyed by window and the RSI of the chunk."""
+
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        ma = {window: ma_chunk_nb(close, *self.ma_state[window], window) for window in self.ma_windows}
+        rsi = rsi_chunk_nb(close, *self.rsi_state, self.rsi_period)
+
+        return ma, rsi
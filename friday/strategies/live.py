@@ -0,0 +1,161 @@
+"""Streaming signal evaluation for Friday."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from .indicators import _rsi_value_nb
+
+
+@njit(cache=True)
+def ma_step_nb(close, cumsum_ring, nancnt_ring, cumsum, nancnt, pos, window):
+    """Advances a moving average by one bar of every symbol, same recurrence as friday.strategies.indicators.ma_nb.
+    The rings hold the running sum and NaN count of the last `window` bars, pos points at the oldest one.
+    Updates the state in place and returns the moving average of the bar."""
+
+    n_cols = close.shape[0]
+    out = np.empty(n_cols)
+
+    for col in range(n_cols):
+        if np.isnan(close[col]):
+            nancnt[col] = nancnt[col] + 1
+        else:
+            cumsum[col] = cumsum[col] + close[col]
+        window_len = window - (nancnt[col] - nancnt_ring[pos, col])
+        window_cumsum = cumsum[col] - cumsum_ring[pos, col]
+        out[col] = np.nan if window_len < window else window_cumsum / window_len
+        cumsum_ring[pos, col] = cumsum[col]
+        nancnt_ring[pos, col] = nancnt[col]
+
+    return out
+
+
+@njit(cache=True)
+def rsi_step_nb(close, last, gains, losses, period):
+    """Advances a Relative Strength Index by one bar of every symbol, same recurrence as friday.strategies.indicators.rsi_nb.
+    Updates the state in place and returns the RSI of the bar."""
+
+    n_cols = close.shape[0]
+    inv_period = 1. / period
+    out = np.empty(n_cols)
+
+    for col in range(n_cols):
+        diff = close[col] - last[col]
+        last[col] = close[col]
+        losses[col] *= (period - 1)
+        gains[col] *= (period - 1)
+        if diff < 0:
+            losses[col] -= diff
+        else:
+            gains[col] += diff
+        losses[col] *= inv_period
+        gains[col] *= inv_period
+        out[col] = _rsi_value_nb(gains[col], losses[col])
+
+    return out
+
+
+class LiveEvaluator:
+    """Streaming evaluator of a strategy. Keeps the rolling moving average and RSI state of every symbol,
+    takes one bar at a time and emits the targeted symbol with its entries and exits. Work per bar does not
+    depend on the history length, the state is persisted to survive restarts."""
+
+    def __init__(self,
+                 strategy,
+                 close=None) -> None:
+        """Warms the indicator state up on the historical closing prices.
+        Parameters:
+        strategy: friday.strategies.Strategy
+        close: pd.DataFrame = None (Historical bars of any timeframe, symbol tickers as columns. None is used by load())
+        Usage:
+            >>> live = LiveEvaluator(Strategy(config), close)
+            >>> live.update('2022-10-10 13:30', {'SPY': 362.79, 'TQQQ': 19.22, ...})
+            {'timestamp': '2022-10-10 13:30', 'target': 'TQQQ', 'entries': [], 'exits': []}
+            >>> live.save('userdata/live.npz')
+            >>> live = LiveEvaluator.load('userdata/live.npz', Strategy(config))"""
+
+        self.strategy = strategy
+        self.symbols = strategy.symbols
+        self.windows = (strategy.params['ma_fast'], strategy.params['ma_slow'])
+        self.period = strategy.params['rsi_period']
+        self.in_trade = -1                                                  # Symbol code currently in position, -1 when closed
+        self.timestamp = None                                               # Last bar taken
+        if close is None:
+            return
+
+        engine = strategy.indicator_engine(close[self.symbols].values)
+        self.ma = {}
+        for window in self.windows:
+            cumsum_tail, nancnt_tail = engine.ma_state[window]
+            self.ma[window] = {'cumsum_ring': cumsum_tail.copy(), 'nancnt_ring': nancnt_tail.copy(),
+                               'cumsum': cumsum_tail[-1].copy(), 'nancnt': nancnt_tail[-1].copy(), 'pos': 0}
+        self.last, self.gains, self.losses = (state.copy() for state in engine.rsi_state)
+        self.timestamp = str(close.index[-1])
+
+    def update(self, timestamp, close) -> dict:
+        """Takes the next bar and returns the targeted symbol with the symbols entered and exited on it.
+        Parameters:
+        timestamp: Timestamp or str of the bar, bars not newer than the last one taken are skipped and return None
+        close: dict or sequence (Closing price per symbol, sequences ordered as the strategy symbols.
+        Missing symbols and NaN prices keep the last close, like the forward fill of the backtests)"""
+
+        if self.timestamp is not None and pd.Timestamp(timestamp) <= pd.Timestamp(self.timestamp):  # Bars replayed by the feed after a restart
+            return None
+
+        close = np.array([close.get(symbol, np.nan) for symbol in self.symbols] if isinstance(close, dict) else close, dtype=np.float64)
+        close = np.where(np.isnan(close), self.last, close)                 # Carried forward before any state is advanced
+
+        ma = {}
+        for window, state in self.ma.items():
+            ma[window] = ma_step_nb(close, state['cumsum_ring'], state['nancnt_ring'], state['cumsum'], state['nancnt'], state['pos'], window)
+            state['pos'] = (state['pos'] + 1) % window
+        rsi = rsi_step_nb(close, self.last, self.gains, self.losses, self.period)
+
+        target = int(self.strategy.select_targets(close, ma[self.windows[0]], ma[self.windows[1]], rsi))
+        entries, exits = [], []
+        if target != self.in_trade:                                         # Target changed, rotate the position
+            entries.append(self.symbols[target])
+            if self.in_trade != -1:
+                exits.append(self.symbols[self.in_trade])
+            self.in_trade = target
+        self.timestamp = str(timestamp)
+
+        return {'timestamp': timestamp, 'target': self.symbols[target], 'entries': entries, 'exits': exits}
+
+    def save(self, path: str) -> None:
+        """Writes the state to a single .npz file, replaced atomically so a crash never leaves a partial state."""
+
+        meta = {'symbols': self.symbols, 'windows': self.windows, 'period': self.period,
+                'in_trade': self.in_trade, 'timestamp': self.timestamp,
+                'pos': {str(window): state['pos'] for window, state in self.ma.items()}}
+        arrays = {f'{name}_{window}': state[name] for window, state in self.ma.items()
+                  for name in ['cumsum_ring', 'nancnt_ring', 'cumsum', 'nancnt']}
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp = f'{path}.tmp.npz'
+        np.savez(temp, meta=np.array(json.dumps(meta)), last=self.last, gains=self.gains, losses=self.losses, **arrays)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str, strategy) -> 'LiveEvaluator':
+        """Restores an evaluator saved by save(), the strategy must use the same symbols and indicator windows."""
+
+        live = cls(strategy)
+        with np.load(path) as state:
+            meta = json.loads(str(state['meta']))
+            if meta['symbols'] != live.symbols or tuple(meta['windows']) != live.windows or meta['period'] != live.period:
+                raise ValueError(f"Saved state in {path} was built for other symbols or indicator windows.")
+
+            live.ma = {window: {name: state[f'{name}_{window}'].copy() for name in ['cumsum_ring', 'nancnt_ring', 'cumsum', 'nancnt']}
+                       for window in live.windows}
+            for window in live.windows:
+                live.ma[window]['pos'] = meta['pos'][str(window)]
+            live.last, live.gains, live.losses = (state[name].copy() for name in ['last', 'gains', 'losses'])
+
+        live.in_trade = meta['in_trade']
+        live.timestamp = meta['timestamp']
+
+        return live
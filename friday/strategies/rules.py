@@ -0,0 +1,154 @@
+"""Declarative rule trees for Friday strategies.
+
+A rule tree is a nested decision tree of plain dicts and strings, so it can live in config.json:
+    node:      "SYMBOL" (Leaf, the targeted symbol)
+               {"if": condition, "then": node, "else": node}
+    condition: "operand comparator operand" (Comparators <, <=, >, >=, ==, !=)
+               {"all": [condition, ...]}, {"any": [condition, ...]}, {"not": condition}
+    operand:   "indicator.SYMBOL" (Indicators close, ma_fast, ma_slow, rsi), a strategy parameter name or a number
+
+compile_rules() turns a tree into a function evaluating it over whole arrays at once.
+"""
+
+import operator
+import re
+
+import numpy as np
+
+INDICATORS = ('close', 'ma_fast', 'ma_slow', 'rsi')
+
+COMPARATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+_condition = re.compile(r'^\s*(\S+)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$')
+
+# Decision tree of the TQQQ strategy, the first matching branch selects the target
+DEFAULT_RULES = {
+    'if': 'close.SPY > ma_slow.SPY',
+    'then': {
+        'if': {'any': ['rsi.TQQQ > tqqq_overbought', 'rsi.SPXL > spxl_overbought']},
+        'then': 'UVXY',
+        'else': 'TQQQ'
+    },
+    'else': {
+        'if': 'rsi.TQQQ < tqqq_oversold',
+        'then': 'TECL',
+        'else': {
+            'if': 'rsi.SPY < spy_oversold',
+            'then': 'SPXL',
+            'else': {
+                'if': {'all': ['rsi.UVXY > uvxy_low', 'rsi.UVXY <= uvxy_high']},
+                'then': 'UVXY',
+                'else': {
+                    'if': 'close.TQQQ > ma_fast.TQQQ',
+                    'then': {'if': 'rsi.SQQQ < sqqq_oversold', 'then': 'SQQQ', 'else': 'TQQQ'},
+                    'else': {'if': 'rsi.SQQQ > rsi.BSV', 'then': 'SQQQ', 'else': 'BSV'}
+                }
+            }
+        }
+    }
+}
+
+
+def _operand(token, codes, params, where):
+    """Compiles an operand to a function of the indicators and parameters."""
+
+    if '.' in token and token.split('.', 1)[0] in INDICATORS:
+        indicator, symbol = token.split('.', 1)
+        if symbol not in codes:
+            raise ValueError(f"Unknown symbol '{symbol}' in rule {where}, symbols are {list(codes)}.")
+        code = codes[symbol]
+        return lambda indicators, p: indicators[indicator][..., code]
+    if token in params:
+        return lambda indicators, p: p[token]
+    try:
+        value = float(token)
+    except ValueError:
+        raise ValueError(f"Unknown operand '{token}' in rule {where}, use indicator.SYMBOL, a parameter or a number.") from None
+    return lambda indicators, p: value
+
+
+def _compile_condition(condition, codes, params, where):
+    """Compiles a condition to a function returning a boolean array."""
+
+    if isinstance(condition, str):
+        match = _condition.match(condition)
+        if match is None:
+            raise ValueError(f"Invalid condition '{condition}' in rule {where}, use 'operand comparator operand'.")
+        left, comparator, right = match.groups()
+        left = _operand(left, codes, params, where)
+        right = _operand(right, codes, params, where)
+        compare = COMPARATORS[comparator]
+        return lambda indicators, p: compare(left(indicators, p), right(indicators, p))
+
+    if isinstance(condition, dict) and len(condition) == 1:
+        (key, value), = condition.items()
+        if key == 'not':
+            inner = _compile_condition(value, codes, params, where)
+            return lambda indicators, p: ~inner(indicators, p)
+        if key in ('all', 'any'):
+            inner = [_compile_condition(c, codes, params, f"{where}.{key}[{x}]") for x, c in enumerate(value)]
+            combine = np.logical_and.reduce if key == 'all' else np.logical_or.reduce
+            return lambda indicators, p: combine([c(indicators, p) for c in inner])
+
+    raise ValueError(f"Invalid condition {condition!r} in rule {where}, use a string or an 'all', 'any' or 'not' entry.")
+
+
+def _compile_node(node, codes, params, where):
+    """Compiles a node to a function returning the symbol codes, branches are merged with np.where."""
+
+    if isinstance(node, str):
+        if node not in codes:
+            raise ValueError(f"Unknown target symbol '{node}' in rule {where}, symbols are {list(codes)}.")
+        code = codes[node]
+        return lambda indicators, p: code
+
+    if not isinstance(node, dict) or set(node) != {'if', 'then', 'else'}:
+        raise ValueError(f"Invalid rule {where}, use a symbol or an 'if', 'then' and 'else' entry.")
+
+    condition = _compile_condition(node['if'], codes, params, where)
+    then = _compile_node(node['then'], codes, params, f"{where}.then")
+    otherwise = _compile_node(node['else'], codes, params, f"{where}.else")
+
+    return lambda indicators, p: np.where(condition(indicators, p), then(indicators, p), otherwise(indicators, p))
+
+
+class CompiledRules:
+    """Rule tree compiled to array operations, see compile_rules(). Pickles as the rule tree and is compiled again
+    when unpickled, so strategies holding it can be sent to worker processes."""
+
+    def __init__(self, rules, symbols, params) -> None:
+        self.rules = rules
+        self.symbols = list(symbols)
+        self.params = set(params)
+        codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.tree = _compile_node(rules, codes, self.params, 'root')
+
+    def __reduce__(self):
+        return CompiledRules, (self.rules, self.symbols, self.params)
+
+    def __call__(self, indicators, p):
+        targets = np.asarray(self.tree(indicators, p))
+        shape = np.broadcast_shapes(np.shape(indicators['close'])[:-1], targets.shape)    # A bare leaf is a scalar
+        return np.broadcast_to(targets, shape)
+
+
+def compile_rules(rules, symbols, params) -> CompiledRules:
+    """Compiles a rule tree into a vectorized function.
+    Parameters:
+    rules: dict or str (Rule tree, see the module documentation)
+    symbols: list (Symbols the indicators are ordered by on their last axis)
+    params: Iterable (Names of the parameters the conditions may refer to)
+    Returns a picklable callable taking the indicators as a dict of arrays with symbols on the last axis and the parameter
+    values, which returns the code of the targeted symbol per bar. Parameter values may be arrays broadcasting against the bars.
+    Usage:
+        >>> select = compile_rules(DEFAULT_RULES, symbols, DEFAULT_PARAMS)
+        >>> targets = select({'close': close, 'ma_fast': ma_20, 'ma_slow': ma_200, 'rsi': rsi}, DEFAULT_PARAMS)"""
+
+    return CompiledRules(rules, symbols, params)
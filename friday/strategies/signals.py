@@ -0,0 +1,57 @@
+"""Signal utilities for Friday."""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def generate_signals_nb(targets, n_symbols):
+    """Compiled position state machine. Walks the targeted symbol codes of every column
+    and writes the entries and exits directly into boolean matrices.
+    Parameters:
+    targets: np.ndarray (2-dim integer array of symbol codes, shape (bars, columns))
+    n_symbols: int
+    Returns boolean entries and exits with shape (bars, columns, n_symbols)"""
+
+    return rotate_signals_nb(targets, n_symbols, np.full(targets.shape[1], -1))
+
+
+@njit(cache=True)
+def rotate_signals_nb(targets, n_symbols, in_trade):
+    """Position state machine of generate_signals_nb continuing from the symbol held per column.
+    Parameters:
+    targets: np.ndarray (2-dim integer array of symbol codes, shape (bars, columns))
+    n_symbols: int
+    in_trade: np.ndarray (Symbol code in position per column, -1 when closed, updated in place)
+    Returns boolean entries and exits with shape (bars, columns, n_symbols)"""
+
+    n_bars, n_cols = targets.shape
+    entries = np.zeros((n_bars, n_cols, n_symbols), dtype=np.bool_)
+    exits = np.zeros((n_bars, n_cols, n_symbols), dtype=np.bool_)
+
+    for col in range(n_cols):
+        for i in range(n_bars):
+            symbol = targets[i, col]
+            if symbol != in_trade[col]:                 # Target changed, rotate the position
+                entries[i, col, symbol] = True
+                if in_trade[col] != -1:
+                    exits[i, col, in_trade[col]] = True
+                in_trade[col] = symbol
+
+    return entries, exits
+
+
+def generate_signals(targets, n_symbols: int):
+    """Derives entries and exits from the symbol targeted at every bar.
+    A position is entered in the targeted symbol on the first bar and whenever the target changes,
+    the previously targeted symbol is exited on that same bar.
+    Parameters:
+    targets: np.ndarray (Integer symbol codes, time on the first axis)
+    n_symbols: int (Number of symbols, codes are positions in the symbol list)
+    Returns boolean entries and exits with shape targets.shape + (n_symbols,)"""
+
+    flat_targets = np.asarray(targets, dtype=np.int64).reshape(len(targets), -1)
+    entries, exits = generate_signals_nb(flat_targets, n_symbols)
+    shape = np.shape(targets) + (n_symbols,)
+
+    return entries.reshape(shape), exits.reshape(shape)
@@ -2,112 +2,156 @@ import numpy as np
 import pandas as pd
 import vectorbt as vbt
 
+from friday.data import PathSet
+from friday.profiling import profiler
+
+from .indicators import IndicatorEngine
+from .rules import DEFAULT_RULES, compile_rules
+from .signals import generate_signals
+
+# Default strategy parameters, overridden by config['strategy']['params']
+DEFAULT_PARAMS = {
+    'ma_fast': 20,              # Moving average window of the TQQQ trend
+    'ma_slow': 200,             # Moving average window of the SPY regime
+    'rsi_period': 10,
+    'tqqq_overbought': 79,
+    'spxl_overbought': 80,
+    'tqqq_oversold': 31,
+    'spy_oversold': 30,
+    'uvxy_low': 74,
+    'uvxy_high': 84,
+    'sqqq_oversold': 31
+}
+
 
 class Strategy:
-    """BacktestingAlpha class based on vectorbt."""
+    """Strategy class based on vectorbt."""
 
     def __init__(self,
                  config) -> None:
         """Initializes the class and pre-sets the following values as instance variables."""
 
+        # Configuration the strategy is built from, worker processes rebuild the strategy from it
+        self.config = config
         # Stocks under consideration
         self.symbols = config['assets']['symbols']
-        # Stock currently in position
-        self.in_trade = None
-        # Trade status
-        self.position_status = 'closed'
-
-    def _signal_generator(self, symbol, en, ex, idx) -> None:
+        # Indicator windows and decision thresholds
+        self.params = {**DEFAULT_PARAMS, **config.get('strategy', {}).get('params', {})}
+        # Integer code of every symbol, used to select the target symbol per bar
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        # Decision tree compiled to array operations, see friday.strategies.rules
+        self.rules = compile_rules(config.get('strategy', {}).get('rules', DEFAULT_RULES), self.symbols, self.params)
 
-        en[symbol][idx] = 1
+    def select_targets(self, close, ma_fast, ma_slow, rsi, params=None):
+        """Evaluates the rule tree for all bars at once and returns the code of the targeted symbol per bar.
+        Parameters:
+        close, ma_fast, ma_slow, rsi: np.ndarray (Symbols on the last axis, ordered as self.symbols)
+        params: dict = None (Thresholds overriding self.params, arrays broadcast against the bars so
+        many parameter combinations are evaluated at once, see friday.optimization.sweep)"""
 
-        if idx == 0:
-            if en[symbol][idx] == 1:
-                self.in_trade = symbol
-                self.position_status = 'opened'
+        p = self.params if params is None else {**self.params, **params}
+        indicators = {'close': close, 'ma_fast': ma_fast, 'ma_slow': ma_slow, 'rsi': rsi}
 
-        elif idx > 0:
-            if np.isnan(en[symbol][idx-1]):
-                ex[self.in_trade][idx] = 1
-                self.position_status = 'closed'
+        return self.rules(indicators, p)
 
-            if en[symbol][idx] == 1 and self.position_status == 'closed':
-                self.position_status = 'opened'
-            else:
-                en[symbol][idx] = -1
-                ex[self.in_trade][idx] = -1
+    def indicator_engine(self, close) -> IndicatorEngine:
+        """Incremental indicator engine over the historical closes with the windows of this strategy."""
 
-        self.in_trade = symbol
+        return IndicatorEngine(close, (self.params['ma_fast'], self.params['ma_slow']), self.params['rsi_period'])
 
     def strategy(self, data, days):
-    
-        ma = vbt.MA.run(data, window=[20, 200]).ma
-        rsi = vbt.talib('rsi').run(data, timeperiod=10).real
+
+        p = self.params
+        with profiler.stage('strategy.indicators', bars=len(data)):
+            ma = vbt.MA.run(data, window=[p['ma_fast'], p['ma_slow']]).ma
+            rsi = vbt.talib('rsi').run(data, timeperiod=p['rsi_period']).real
 
         ma = ma.iloc[-days:]
         rsi = rsi.iloc[-days:]
         data = data.iloc[-days:]
-        entries = pd.DataFrame(np.nan, index=data.index, columns=self.symbols)
-        exits = pd.DataFrame(np.nan, index=data.index, columns=self.symbols)
-
-        for y in range(len(data['SPY'])):
-            if data['SPY'][y] > ma[200]['SPY'][y]:
-                if rsi[10]['TQQQ'][y] > 79:
-                    self._signal_generator('UVXY', entries, exits, y)
-
-                else:
-                    if rsi[10]['SPXL'][y] > 80:
-                        self._signal_generator('UVXY', entries, exits, y)
-
-                    else:
-                        self._signal_generator('TQQQ', entries, exits, y)
-
-            else:
-                if rsi[10]['TQQQ'][y] < 31:
-                    self._signal_generator('TECL', entries, exits, y)
-
-                else:
-                    if rsi[10]['SPY'][y] < 30:
-                        self._signal_generator('SPXL', entries, exits, y)
-
-                    else:
-                        if rsi[10]['UVXY'][y] > 74:
-                            if rsi[10]['UVXY'][y] > 84:
-                                if data['TQQQ'][y] > ma[20]['TQQQ'][y]:
-                                    if rsi[10]['SQQQ'][y] < 31:
-                                        self._signal_generator('SQQQ', entries, exits, y)
-
-                                    else:
-                                        self._signal_generator('TQQQ', entries, exits, y)
-                                
-                                else:
-                                    if rsi[10]['SQQQ'][y] > rsi[10]['BSV'][y]:
-                                        self._signal_generator('SQQQ', entries, exits, y)
-
-                                    else:
-                                        self._signal_generator('BSV', entries, exits, y)
-
-                            else:
-                                self._signal_generator('UVXY', entries, exits, y)
-
-                        else:
-                            if data['TQQQ'][y] > ma[20]['TQQQ'][y]:
-                                if rsi[10]['SQQQ'][y] < 31:
-                                    self._signal_generator('SQQQ', entries, exits, y)
-
-                                else:
-                                    self._signal_generator('TQQQ', entries, exits, y)
-
-                            else:
-                                if rsi[10]['SQQQ'][y] > rsi[10]['BSV'][y]:
-                                    self._signal_generator('SQQQ', entries, exits, y)
-
-                                else:
-                                    self._signal_generator('BSV', entries, exits, y)
-
-        entries.replace({1: True, np.nan: False, -1: False}, inplace=True)
-        exits.replace({1: True, np.nan: False, -1: False}, inplace=True)
-        entries = entries.values.tolist()
-        exits = exits.values.tolist()    
-
-        return data, entries, exits
\ No newline at end of file
+
+        with profiler.stage('strategy.signals', bars=len(data)):
+            targets = self.select_targets(data[self.symbols].values,
+                                          ma[p['ma_fast']][self.symbols].values,
+                                          ma[p['ma_slow']][self.symbols].values,
+                                          rsi[p['rsi_period']][self.symbols].values)
+            entries, exits = generate_signals(targets, len(self.symbols))
+        profiler.count('bars_processed', targets.size)
+
+        return data, entries, exits
+
+    def strategy_batch(self, data, days):
+        """Batched variant of strategy() evaluating many synthetic paths in one pass.
+        Parameters:
+        data: pd.DataFrame (Close prices with (path, symbol) MultiIndex columns)
+        days: int
+        Returns the close prices, entries and exits as DataFrames sharing the (path, symbol) columns."""
+
+        paths = data.columns.get_level_values(0).unique()
+        columns = pd.MultiIndex.from_product([paths, self.symbols], names=['path', 'symbol'])
+        data = data.reindex(columns=columns)                                # Path-major column order, symbols ordered as self.symbols
+
+        p = self.params
+        with profiler.stage('strategy.indicators', bars=len(data), paths=len(paths)):
+            ma = vbt.MA.run(data, window=[p['ma_fast'], p['ma_slow']]).ma
+            rsi = vbt.talib('rsi').run(data, timeperiod=p['rsi_period']).real
+
+        ma = ma.iloc[-days:]
+        rsi = rsi.iloc[-days:]
+        data = data.iloc[-days:]
+
+        shape = (len(data), len(paths), len(self.symbols))                 # (bars, paths, symbols)
+        with profiler.stage('strategy.signals', bars=len(data), paths=len(paths)):
+            targets = self.select_targets(data.values.reshape(shape),
+                                          ma[p['ma_fast']].values.reshape(shape),
+                                          ma[p['ma_slow']].values.reshape(shape),
+                                          rsi[p['rsi_period']].values.reshape(shape))
+            entries, exits = generate_signals(targets, len(self.symbols))
+        profiler.count('bars_processed', targets.size)
+        entries = pd.DataFrame(entries.reshape(len(data), -1), index=data.index, columns=columns)
+        exits = pd.DataFrame(exits.reshape(len(data), -1), index=data.index, columns=columns)
+
+        return data, entries, exits
+
+    def strategy_paths(self, close, future, future_index, days, engine=None, path_ids=None):
+        """Batched variant of strategy() taking the shared history and the projected paths separately.
+        The indicators are extended from their historical state (see friday.strategies.indicators),
+        so the cost per path scales with the projected days instead of the history length.
+        Parameters: See signal_paths()
+        Returns the close prices, entries and exits as DataFrames sharing the (path, symbol) columns."""
+
+        return self.signal_paths(close, future, future_index, days, engine, path_ids, dtype=np.float64).frames()
+
+    def signal_paths(self, close, future, future_index, days, engine=None, path_ids=None, dtype=np.float32,
+                     chunk_size: int = 10000) -> PathSet:
+        """Evaluates the projected paths into a compact path container, see friday.data.paths.
+        Parameters:
+        close: pd.DataFrame (Historical closing prices, symbol tickers as columns ordered as self.symbols)
+        future: np.ndarray (Projected prices with shape (future days, paths, symbols), see Synthesizer.project())
+        future_index: list (Future dates)
+        days: int
+        engine: IndicatorEngine = None (Built from close when not given, pass one to reuse it across calls)
+        path_ids: Iterable = None (Label of every path, defaults to 0 ... paths-1)
+        dtype: np.dtype = np.float32 (Price dtype of the container, the signals are evaluated on float64 prices)
+        chunk_size: int = 10000 (Paths evaluated at once, bounds the float64 indicator arrays held while evaluating)
+        Returns the prices and boolean entries and exits of the last `days` bars of every path."""
+
+        p = self.params
+        engine = self.indicator_engine(close.values) if engine is None else engine
+        if future.shape[1] > chunk_size:
+            path_ids = pd.Index(range(future.shape[1]) if path_ids is None else path_ids)
+            return PathSet.concat([self.signal_paths(close, np.ascontiguousarray(future[:, x:x + chunk_size]), future_index, days, engine,
+                                                     path_ids[x:x + chunk_size], dtype, chunk_size)
+                                   for x in range(0, future.shape[1], chunk_size)])
+
+        with profiler.stage('strategy.indicators', bars=days, paths=future.shape[1]):
+            ma, rsi = engine.extend(future, days)
+            prices = engine.tail(close.values, future, days)               # (bars, paths, symbols)
+        with profiler.stage('strategy.signals', bars=days, paths=future.shape[1]):
+            targets = self.select_targets(prices, ma[p['ma_fast']], ma[p['ma_slow']], rsi)
+            entries, exits = generate_signals(targets, len(self.symbols))
+        profiler.count('bars_processed', targets.size)
+
+        index = close.index.append(pd.Index(future_index))[-days:]
+
+        return PathSet(index, self.symbols, prices, entries, exits, path_ids, dtype=dtype)
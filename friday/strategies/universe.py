@@ -0,0 +1,206 @@
+"""Cross-sectional universe strategies for Friday.
+
+Ranks every symbol of a universe on one indicator per bar and holds the best ranked symbols of every group,
+e.g. the ETF with the highest RSI of each sector. Indicators are computed for the whole universe as one
+(bars, symbols) array and the selection is a compiled scan per bar, so the cost grows linearly with the
+number of symbols instead of with per-symbol Python code.
+
+The 'universe' entry of config.json selects the groups and the ranking:
+    "universe": {
+        "groups": {"equity": ["SPY", "QQQ", ...], "bonds": ["BSV", "TLT", ...]},
+        "rank_by": "rsi",           (rsi, ma_fast or ma_slow, the moving averages rank by close / ma - 1)
+        "select": "highest",        (highest or lowest)
+        "top": 1,                   (Symbols held per group)
+        "above": null,              (Only scores above this value are eligible)
+        "below": null               (Only scores below this value are eligible)
+    }
+Without groups the symbols of config['assets']['symbols'] form a single group.
+"""
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from friday.profiling import profiler
+
+from .indicators import ma_nb, rsi_nb
+from .strategy import DEFAULT_PARAMS
+
+# Default ranking, overridden by config['universe']
+DEFAULT_UNIVERSE = {
+    'rank_by': 'rsi',
+    'select': 'highest',
+    'top': 1,
+    'above': None,
+    'below': None
+}
+
+RANKINGS = ('rsi', 'ma_fast', 'ma_slow')
+
+
+@njit(cache=True)
+def select_nb(score, members, offsets, top, largest):
+    """Selects the `top` best scored symbols of every group on every bar, NaN scores are never selected.
+    Parameters:
+    score: np.ndarray (Scores with shape (bars, symbols))
+    members: np.ndarray (Symbol codes of every group, one after the other)
+    offsets: np.ndarray (Start of every group in members, followed by len(members))
+    top: int
+    largest: bool (Selects the highest scores, otherwise the lowest)
+    Returns the selected symbol codes with shape (bars, groups * top), -1 where a group has fewer valid scores."""
+
+    n_bars = score.shape[0]
+    n_groups = len(offsets) - 1
+    targets = np.full((n_bars, n_groups * top), -1, dtype=np.int64)
+    sign = 1. if largest else -1.
+
+    for i in range(n_bars):
+        for group in range(n_groups):
+            begin, end = offsets[group], offsets[group + 1]
+            if top == 1:                                        # argmax scan, ties keep the first symbol of the group
+                best = -np.inf
+                for x in range(begin, end):
+                    value = sign * score[i, members[x]]
+                    if value > best:
+                        best = value
+                        targets[i, group] = members[x]
+            else:
+                values = np.empty(end - begin)
+                for x in range(begin, end):
+                    values[x - begin] = -sign * score[i, members[x]]
+                order = np.argsort(values, kind='mergesort')    # NaN scores sort last
+                for slot in range(min(top, end - begin)):
+                    if np.isnan(values[order[slot]]):
+                        break
+                    targets[i, group * top + slot] = members[begin + order[slot]]
+
+    return targets
+
+
+@njit(cache=True)
+def target_weights_nb(targets, n_symbols, weight):
+    """Target percent of the portfolio value per symbol on the bars where the selection changes, NaN on every other
+    bar and symbol so no order is placed. Every selected slot holds `weight`, symbols leaving the selection go to 0.
+    Parameters:
+    targets: np.ndarray (Selected symbol codes with shape (bars, slots), -1 keeps the slot in cash)
+    n_symbols: int
+    weight: float
+    Returns the target percents with shape (bars, n_symbols)."""
+
+    n_bars, n_slots = targets.shape
+    size = np.full((n_bars, n_symbols), np.nan)
+    held = np.zeros(n_symbols)
+    selected = np.zeros(n_symbols)
+
+    for i in range(n_bars):
+        selected[:] = 0.
+        for slot in range(n_slots):
+            if targets[i, slot] >= 0:
+                selected[targets[i, slot]] += weight            # A symbol of many groups holds the weight of each
+        changed = False
+        for col in range(n_symbols):
+            if selected[col] != held[col]:
+                changed = True
+                break
+        if not changed:
+            continue
+        for col in range(n_symbols):                            # Rebalances every held symbol back to its weight
+            if selected[col] != 0 or held[col] != 0:
+                size[i, col] = selected[col]
+            held[col] = selected[col]
+
+    return size
+
+
+class UniverseStrategy:
+    """Cross-sectional rotation over a universe of symbols split into groups, see the module documentation."""
+
+    def __init__(self,
+                 config) -> None:
+        """Initializes the class and pre-sets the following values as instance variables.
+        Parameters:
+        config: Configuration loaded from config.json.
+        Usage:
+            >>> strategy = UniverseStrategy(config)
+            >>> close, size = strategy.strategy(close)
+            >>> pf = simulate_universe(close, size)"""
+
+        universe = {**DEFAULT_UNIVERSE, **config.get('universe', {})}
+        # Groups of symbols ranked separately, symbols may belong to many groups
+        self.groups = universe.get('groups') or {'all': config['assets']['symbols']}
+        # Every symbol of the universe once, in order of appearance
+        self.symbols = list(dict.fromkeys(symbol for members in self.groups.values() for symbol in members))
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        # Indicator windows of the rule strategy, see friday.strategies.strategy
+        self.params = {**DEFAULT_PARAMS, **config.get('strategy', {}).get('params', {})}
+        self.rank_by = universe['rank_by']
+        self.largest = universe['select'] == 'highest'
+        self.top = int(universe['top'])
+        self.above = universe['above']
+        self.below = universe['below']
+
+        if self.rank_by not in RANKINGS:
+            raise ValueError(f"Unknown ranking '{self.rank_by}', use one of {RANKINGS}.")
+        if universe['select'] not in ('highest', 'lowest'):
+            raise ValueError(f"Unknown selection '{universe['select']}', use 'highest' or 'lowest'.")
+        if self.top < 1:
+            raise ValueError(f"At least one symbol per group has to be held, got top={self.top}.")
+        empty = [name for name, members in self.groups.items() if not members]
+        if empty:
+            raise ValueError(f"Groups {empty} have no symbols.")
+
+        # Groups as symbol codes one after the other, the offsets delimit every group
+        self.members = np.array([self.codes[symbol] for members in self.groups.values() for symbol in members], dtype=np.int64)
+        self.offsets = np.cumsum([0] + [len(members) for members in self.groups.values()]).astype(np.int64)
+        # Share of the portfolio value held by every selected symbol
+        self.weight = 1 / (len(self.groups) * self.top)
+
+    @property
+    def warmup(self) -> int:
+        """Bars needed before the first valid score."""
+
+        return self.params['rsi_period' if self.rank_by == 'rsi' else self.rank_by]
+
+    def score(self, close) -> np.ndarray:
+        """Scores every symbol on every bar with the ranking indicator, ineligible scores are NaN.
+        Parameters:
+        close: np.ndarray (Closing prices with shape (bars, symbols), ordered as self.symbols)"""
+
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        if self.rank_by == 'rsi':
+            score = rsi_nb(close, self.params['rsi_period'])[0]
+        else:
+            score = close / ma_nb(close, self.params[self.rank_by])[0] - 1
+
+        if self.above is not None:
+            score[~(score > self.above)] = np.nan
+        if self.below is not None:
+            score[~(score < self.below)] = np.nan
+
+        return score
+
+    def select_targets(self, score) -> np.ndarray:
+        """Codes of the symbols held on every bar with shape (bars, groups * top), -1 for slots kept in cash."""
+
+        return select_nb(np.ascontiguousarray(score), self.members, self.offsets, self.top, self.largest)
+
+    def strategy(self, data, days: int = None):
+        """Ranks the universe over the closes and returns the bars to trade with the target percent of every symbol.
+        Parameters:
+        data: pd.DataFrame (Closing prices with symbol tickers as columns)
+        days: int = None (Bars traded at the end of data, None trades every bar after the warmup)
+        Returns the close prices and target percents as DataFrames with the columns ordered as self.symbols,
+        the target percents are NaN where no order is placed."""
+
+        data = data[self.symbols]
+        days = len(data) - self.warmup if days is None else days
+
+        with profiler.stage('strategy.indicators', bars=len(data), symbols=len(self.symbols)):
+            score = self.score(data.values)[-days:]
+        with profiler.stage('strategy.signals', bars=days, symbols=len(self.symbols)):
+            targets = self.select_targets(score)
+            size = target_weights_nb(targets, len(self.symbols), self.weight)
+        profiler.count('bars_processed', score.size)
+
+        data = data.iloc[-days:]
+        return data, pd.DataFrame(size, index=data.index, columns=data.columns)
@@ -1,4 +1,8 @@
-from .datetime_ import (get_future_dates, get_processed_dates,
-                        get_simulation_end_date)
-from .random_ import generate_random_market_dates
-from .trading_ import timeframe
+from .calendar_ import TradingCalendar, get_trading_calendar
+from .datetime_ import (get_active_dates, get_future_dates,
+                        get_processed_dates, get_simulation_end_date)
+from .random_ import (block_bootstrap_indices, bootstrap_indices,
+                      generate_random_market_dates,
+                      generate_random_market_indices, sample_session_indices,
+                      stationary_bootstrap_indices)
+from .trading_ import timeframe
\ No newline at end of file
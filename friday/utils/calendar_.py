@@ -0,0 +1,99 @@
+"""Trading calendar utilities for Friday."""
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pandas_market_calendars as mcal
+
+from friday.profiling import profiler
+
+
+class TradingCalendar:
+    """Precomputed trading calendar. Builds the session dates of an exchange once, caches them on disk
+    and answers date queries with binary searches on a sorted datetime64 array."""
+
+    def __init__(self,
+                 name: str = 'NYSE',
+                 first: str = '2000-01-01',
+                 last: str = '2035-12-31',
+                 path: str = 'userdata/calendar') -> None:
+        """Loads the sessions from the disk cache, building them with pandas_market_calendars when missing.
+        Parameters:
+        name: str = 'NYSE' (Exchange calendar name)
+        first: str = '2000-01-01' (First date covered. Format %Y-%m-%d)
+        last: str = '2035-12-31' (Last date covered. Format %Y-%m-%d)
+        path: str = 'userdata/calendar' (Directory of the disk cache)
+        Usage:
+            >>> nyse = TradingCalendar()
+            >>> nyse.sessions_between('2022-06-17', '2022-08-17')
+            >>> nyse.next_sessions('2022-10-17', 15)"""
+
+        self.name = name
+        self.first = np.datetime64(first, 'D')
+        self.last = np.datetime64(last, 'D')
+        self.file = os.path.join(path, f"{name}_{first}_{last}.npy")
+
+        if os.path.exists(self.file):
+            with profiler.stage('calendar.load', calendar=name):
+                self.sessions = np.load(self.file)
+        else:
+            with profiler.stage('calendar.build', calendar=name):
+                self.sessions = self._build()
+                os.makedirs(path, exist_ok=True)
+                temp = f'{self.file}.{os.getpid()}.tmp.npy'                  # Concurrent processes never load a partial file
+                np.save(temp, self.sessions)
+                os.replace(temp, self.file)
+
+    def _build(self) -> np.ndarray:
+        schedule = mcal.get_calendar(self.name).schedule(start_date=str(self.first), end_date=str(self.last))
+        return schedule.index.values.astype('datetime64[D]')
+
+    def _date(self, date) -> np.datetime64:
+        date = np.datetime64(pd.Timestamp(date).date(), 'D')
+        if not self.first <= date <= self.last:
+            raise ValueError(f"{date} is outside of the {self.name} calendar range {self.first} - {self.last}.")
+        return date
+
+    def _index(self, positions) -> pd.DatetimeIndex:
+        """Session dates as a UTC DatetimeIndex normalized to the day, as returned by mcal.date_range(...).normalize()."""
+
+        return pd.DatetimeIndex(self.sessions[positions].astype('datetime64[ns]')).tz_localize('UTC')
+
+    def position(self, date, side: str = 'left') -> int:
+        """Position of the first session on or after date ('left') or the first session after date ('right')."""
+
+        return int(np.searchsorted(self.sessions, self._date(date), side=side))
+
+    def is_session(self, date) -> bool:
+        loc = self.position(date)
+        return loc < len(self.sessions) and self.sessions[loc] == self._date(date)
+
+    def sessions_between(self, start, end) -> pd.DatetimeIndex:
+        """Sessions between start and end, both inclusive."""
+
+        return self._index(slice(self.position(start), self.position(end, side='right')))
+
+    def next_sessions(self, date, n: int) -> pd.DatetimeIndex:
+        """The next n sessions starting on or after date."""
+
+        loc = self.position(date)
+        if loc + n > len(self.sessions):
+            raise ValueError(f"Less than {n} sessions left in the {self.name} calendar after {date}.")
+        return self._index(slice(loc, loc + n))
+
+    def previous_sessions(self, date, n: int) -> pd.DatetimeIndex:
+        """The n sessions before date, date excluded."""
+
+        loc = self.position(date)
+        if loc < n:
+            raise ValueError(f"Less than {n} sessions in the {self.name} calendar before {date}.")
+        return self._index(slice(loc - n, loc))
+
+
+@lru_cache(maxsize=None)
+def get_trading_calendar(name: str = 'NYSE') -> TradingCalendar:
+    """Returns the process wide TradingCalendar of an exchange, built or loaded once."""
+
+    return TradingCalendar(name)
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 import pandas_market_calendars as mcal
 import pytz
 
+from .calendar_ import get_trading_calendar
+
 
 def get_future_dates(start,
                      simulation_end,
@@ -16,22 +18,10 @@ def get_future_dates(start,
     interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)"""
     
     tz = pytz.timezone('US/Eastern')                                            # Gets the New_york timezone
-    nyse = mcal.get_calendar('NYSE')
-    early = nyse.schedule(start_date=start, end_date=simulation_end)            # Gets the scheduled dates between the given time range
-    active_days = mcal.date_range(early, frequency=interval).normalize()        # Normalizes the time unit to easily compare with future time indexes
-
     current_date = datetime.now(tz).date()                                      # Gets the current date for the selected timezone
-    simulation_end = datetime.strptime(simulation_end, '%Y-%m-%d').date()       # Converts projection date into datetime format then extracts the date from it
-
-    if str(current_date) in active_days:
-        loc = active_days.get_loc(str(current_date))                            # Gets the index location of the current date in the NYSE market calendar
-    else:
-        int_day = current_date.isoweekday()                                     # Checks if the current date is a weekday, returns 1 for Monday ... 7 for Sunday.
-        adjusted_date = current_date + timedelta(8-int_day)                     # Offsets the date (e.g., If current days results as a Saturday, 
-                                                                                # int_day = 6 Hence the current date will shift forward  2 days)
-        loc = active_days.get_loc(str(adjusted_date))                           # Gets the index location of the adjusted date in the NYSE market calendar
 
-    future_index = [active_days[x] for x in range(loc, len(active_days))]       # Returns a list of future dates that will be active uptil projection date
+    # Active dates from the current date (rolled forward to the next session on weekends and holidays) till simulation_end
+    future_index = list(get_active_dates(max(str(current_date), start), simulation_end, interval))
 
     return future_index
 
@@ -51,9 +41,7 @@ def get_processed_dates(start: str,
 
     tz = pytz.timezone('US/Eastern')                                    # Gets the New_york timezone
 
-    nyse = mcal.get_calendar('NYSE')
-    early = nyse.schedule(start_date=available_start, end_date='2022-01-01')   # Gets the scheduled dates between the given time range
-    active_days = mcal.date_range(early, frequency=interval)
+    active_days = get_active_dates(available_start, '2022-01-01', interval)   # Gets the scheduled dates between the given time range
 
     current_date = datetime.now(tz).date()                              # Gets the current date for the selected timezone
     end_date = datetime.strptime(end, '%Y-%m-%d').date()                # Converts projection date into datetime format then extracts the date from it
@@ -80,9 +68,29 @@ def get_simulation_end_date(start,
                             interval: str = '1d'):
 
     adjusted_start = str((datetime.strptime(start, '%Y-%m-%d') - timedelta(1)).date()) # Offset the date by 1
-    nyse = mcal.get_calendar('NYSE')
-    early = nyse.schedule(start_date=adjusted_start, end_date='2030-01-01') # Gets the scheduled dates between the given time range
-    active_days = mcal.date_range(early, frequency=interval)
+
+    if interval == '1d':
+        active_days = get_trading_calendar().next_sessions(adjusted_start, days + 1)   # Binary search in the cached NYSE sessions
+    else:
+        active_days = get_active_dates(adjusted_start, '2030-01-01', interval)
     simulation_end_date = str(active_days[days].date())
 
     return simulation_end_date
+
+def get_active_dates(start,
+                     end,
+                     interval: str = '1d'):
+    """Fetches the active trading dates between start and end, normalized to the day.
+    Parameters:
+    start: str (Format %Y-%m-%d)
+    end: str (Format %Y-%m-%d)
+    interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)"""
+
+    if interval == '1d':
+        return get_trading_calendar().sessions_between(start, end)          # Binary search in the cached NYSE sessions
+
+    nyse = mcal.get_calendar('NYSE')
+    early = nyse.schedule(start_date=start, end_date=end)                   # Gets the scheduled dates between the given time range
+    active_days = mcal.date_range(early, frequency=interval).normalize()    # Normalizes the time unit to easily compare with future time indexes
+
+    return active_days
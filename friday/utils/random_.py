@@ -1,30 +1,127 @@
 """Random generation utilities for Friday."""
 
-import random
 from datetime import datetime
 
-import pandas_market_calendars as mcal
+import numpy as np
+
+from .datetime_ import get_active_dates
+
+
+def sample_session_indices(low,
+                           high,
+                           size,
+                           paths: int = 1,
+                           rng=None):
+    """Draws `size` distinct positions in [low, high) for every path.
+    Parameters:
+    low: int
+    high: int
+    size: int (Number of positions per path, cannot exceed high - low)
+    paths: int = 1
+    rng: np.random.Generator, SeedSequence or int seed = None (None draws from fresh OS entropy)
+    Returns an integer array with shape (size, paths)."""
+
+    if size > high - low:
+        raise ValueError(f"Cannot draw {size} distinct positions from the {max(high - low, 0)} in [{low}, {high}), "
+                         f"use a longer history or the 'block' or 'stationary' bootstrap.")
+
+    rng = np.random.default_rng(rng)
+    keys = rng.random((paths, high - low))                                # Random sort keys, one row per path
+    indices = np.argsort(keys, axis=1)[:, :size].T + low                    # First `size` positions of a random permutation per path
+
+    return indices
+
+
+def block_bootstrap_indices(low,
+                            high,
+                            size,
+                            paths: int = 1,
+                            block: int = 5,
+                            rng=None):
+    """Draws runs of `block` consecutive positions in [low, high) for every path (moving block bootstrap),
+    consecutive sessions keep the volatility clustering of the history.
+    Parameters: See sample_session_indices()
+    block: int = 5 (Block length, shortened to the range when longer)
+    Returns an integer array with shape (size, paths)."""
+
+    rng = np.random.default_rng(rng)
+    block = max(min(block, high - low), 1)
+    starts = rng.integers(low, high - block + 1, (-(-size // block), paths))  # One random start per block
+    indices = (starts[:, None, :] + np.arange(block)[None, :, None]).reshape(-1, paths)
+
+    return indices[:size]
+
+
+def stationary_bootstrap_indices(low,
+                                 high,
+                                 size,
+                                 paths: int = 1,
+                                 block: float = 5,
+                                 rng=None):
+    """Draws positions in [low, high) for every path with the stationary bootstrap of Politis and Romano.
+    Every position starts a new block with probability 1 / block, otherwise it continues the current block,
+    wrapping around the range, so block lengths are geometric with mean `block`.
+    Parameters: See sample_session_indices()
+    block: float = 5 (Mean block length)
+    Returns an integer array with shape (size, paths)."""
+
+    rng = np.random.default_rng(rng)
+    steps = np.arange(size)[:, None]
+    new_block = rng.random((size, paths)) < 1 / block
+    new_block[0] = True
+    starts = rng.integers(low, high, (size, paths))
+
+    # Step at which the current block of every position started, then its offset into the block
+    block_start = np.maximum.accumulate(np.where(new_block, steps, 0), axis=0)
+    offset = steps - block_start
+    first = np.take_along_axis(starts, block_start, axis=0)
+
+    return low + (first - low + offset) % (high - low)
+
+
+def bootstrap_indices(low,
+                      high,
+                      size,
+                      paths: int = 1,
+                      method: str = 'sample',
+                      block: float = 5,
+                      rng=None):
+    """Draws positions in [low, high) for every path with the given resampling method.
+    Parameters: See sample_session_indices()
+    method: str = 'sample' ('sample' draws distinct positions, 'block' the moving block bootstrap and
+    'stationary' the stationary bootstrap)
+    block: float = 5 (Block length of 'block', mean block length of 'stationary')
+    Returns an integer array with shape (size, paths)."""
+
+    if method == 'sample':
+        return sample_session_indices(low, high, size, paths, rng=rng)
+    elif method == 'block':
+        return block_bootstrap_indices(low, high, size, paths, int(block), rng=rng)
+    elif method == 'stationary':
+        return stationary_bootstrap_indices(low, high, size, paths, block, rng=rng)
+
+    raise ValueError(f"Unknown bootstrap method '{method}', use 'sample', 'block' or 'stationary'.")
 
 
 def generate_random_market_dates(start,
                                  end,
                                  future_dates,
-                                 interval: str = '1d'):
-    """Fetches the active trading dates for the market and generates random dates to 
+                                 interval: str = '1d',
+                                 rng=None):
+    """Fetches the active trading dates for the market and generates random dates to
     to form synthetic data.
     Parameters:
     projection_date: str (Any date in the future. Format %Y-%m-%d)
     available_start: str = '2015-12-01' (Earliest starting point to fetch data from. Format %Y-%m-%d)
-    interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)"""
-    
-    nyse = mcal.get_calendar('NYSE')
-    early = nyse.schedule(start_date=start, end_date=end)                   # Gets the scheduled dates between the given time range
-    active_days = mcal.date_range(early, frequency=interval).normalize()    # Normalizes the time unit to easily compare with future time indexes
+    interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)
+    rng: np.random.Generator, SeedSequence or int seed = None"""
+
+    active_days = get_active_dates(start, end, interval)
 
     end = datetime.strptime(end, '%Y-%m-%d').date()                         # Converts projection date into datetime format then extracts the date from it
 
     loc = active_days.get_loc(str(end))
-    randomlist = random.sample(range(1, loc), len(future_dates))            # Returns a random sample of index locations that can be used to get random dates
+    randomlist = sample_session_indices(1, loc, len(future_dates), rng=rng)[:, 0]  # Returns a random sample of index locations that can be used to get random dates
 
     selected_random_dates = []
 
@@ -33,4 +130,35 @@ def generate_random_market_dates(start,
         selected_random_dates.append(active_days[idx-1])
         selected_random_dates.append(active_days[idx])
 
-    return selected_random_dates
\ No newline at end of file
+    return selected_random_dates
+
+
+def generate_random_market_indices(start,
+                                   end,
+                                   size,
+                                   paths: int = 1,
+                                   interval: str = '1d',
+                                   rng=None,
+                                   method: str = 'sample',
+                                   block: float = 5):
+    """Vectorized counterpart of generate_random_market_dates drawing random trading sessions for many paths at once.
+    Every path samples its sessions without replacement by default, the same session is used for all symbols to preserve cross-asset correlation.
+    Parameters:
+    start: str (Format %Y-%m-%d)
+    end: str (Format %Y-%m-%d)
+    size: int (Number of sessions to draw per path)
+    paths: int = 1
+    interval: str (Supported trading intervals - e.g. '1m', '45m', '1h', '1d' etc.)
+    rng: np.random.Generator, SeedSequence or int seed = None
+    method: str = 'sample' (Resampling method, see bootstrap_indices())
+    block: float = 5
+    Returns the active sessions and an integer array of positions into them with shape (size, paths)."""
+
+    active_days = get_active_dates(start, end, interval)
+
+    end = datetime.strptime(end, '%Y-%m-%d').date()                         # Converts projection date into datetime format then extracts the date from it
+
+    loc = active_days.get_loc(str(end))
+    indices = bootstrap_indices(1, loc, size, paths, method, block, rng=rng)  # Positions 1 ... loc-1, the previous session is always available
+
+    return active_days, indices
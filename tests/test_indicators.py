@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+import vectorbt as vbt
+
+from friday.benchmarks.fixtures import fixture_close
+from friday.strategies.indicators import ChunkedIndicators, IndicatorEngine
+
+
+def _reference(close, windows=(20, 200), period=10):
+    ma = {window: vbt.MA.run(close, window=window).ma.values for window in windows}
+    rsi = vbt.talib('rsi').run(close, timeperiod=period).real.values
+    return ma, rsi
+
+
+def _close(n_bars=900):
+    close = fixture_close(n_bars).reset_index(drop=True)                # Forward filled like the closes of every caller
+    close.iloc[:250, 2] = np.nan                                        # Late listing
+    return close
+
+
+def test_engine_extend_matches_vectorbt():
+    close = _close()
+    history, n_future, n_paths = close.iloc[:600], len(close) - 600, 3
+    rng = np.random.default_rng(0)
+    future = close.values[-1] * np.cumprod(1 + rng.normal(0, 0.02, (n_future, n_paths, close.shape[1])), axis=0)
+
+    engine = IndicatorEngine(history.values)
+    ma, rsi = engine.extend(future, days=len(close))
+
+    for path in range(n_paths):
+        ref_ma, ref_rsi = _reference(pd.DataFrame(np.concatenate([history.values, future[:, path]]), columns=close.columns))
+        for window in (20, 200):
+            np.testing.assert_array_equal(ma[window][:, path], ref_ma[window])
+        np.testing.assert_array_equal(rsi[:, path], ref_rsi)
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 199, 900])
+def test_chunked_indicators_match_vectorbt(chunk):
+    close = _close()
+    ref_ma, ref_rsi = _reference(close)
+
+    indicators = ChunkedIndicators(close.shape[1])
+    parts = [indicators.update(close.values[x:x + chunk]) for x in range(0, len(close), chunk)]
+
+    for window in (20, 200):
+        np.testing.assert_array_equal(np.concatenate([ma[window] for ma, _ in parts]), ref_ma[window])
+    np.testing.assert_array_equal(np.concatenate([rsi for _, rsi in parts]), ref_rsi)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import vectorbt as vbt
+
+from friday.backtesting.intraday import ChunkedBacktest
+from friday.benchmarks.fixtures import fixture_close, fixture_symbols
+from friday.strategies import Strategy, generate_signals
+
+
+def _close(n_bars=1500, seed=0):
+    close = fixture_close(n_bars)
+    missing = np.random.default_rng(seed).random(close.shape) < 0.02     # Bars missing from the feed
+    missing[0] = False
+    return close.mask(missing)
+
+
+def _run(strategy, close, chunk):
+    backtest = ChunkedBacktest(strategy)
+    value = backtest.run(close.iloc[x:x + chunk] for x in range(0, len(close), chunk))
+    return value, backtest.orders()
+
+
+def test_chunked_backtest_matches_from_signals():
+    close = _close()
+    strategy = Strategy({'assets': {'symbols': fixture_symbols()}})
+    p = strategy.params
+    value, orders = _run(strategy, close, 250)
+
+    filled = close.ffill()
+    ma_fast = vbt.MA.run(filled, window=p['ma_fast']).ma.values
+    ma_slow = vbt.MA.run(filled, window=p['ma_slow']).ma.values
+    rsi = vbt.talib('rsi').run(filled, timeperiod=p['rsi_period']).real.values
+    warmup = max(p['ma_fast'], p['ma_slow'], p['rsi_period'])
+    data = filled.iloc[warmup:]
+    targets = strategy.select_targets(data.values, ma_fast[warmup:], ma_slow[warmup:], rsi[warmup:])
+    entries, exits = generate_signals(targets, len(strategy.symbols))
+    pf = vbt.Portfolio.from_signals(close=data, entries=entries, exits=exits, price=data, cash_sharing=True,
+                                    val_price=data.vbt.fshift(1), init_cash=10000, group_by=True, call_seq='auto', freq='d')
+
+    assert len(orders) == len(pf.orders.records) > 10
+    pd.testing.assert_index_equal(value.index, data.index)
+    np.testing.assert_allclose(value.values, pf.value().values, rtol=1e-10)
+
+
+@pytest.mark.parametrize('chunk', [1, 37, 2000])
+def test_chunked_backtest_does_not_depend_on_chunks(chunk):
+    close = _close()
+    strategy = Strategy({'assets': {'symbols': fixture_symbols()}})
+
+    value, orders = _run(strategy, close, chunk)
+    reference, reference_orders = _run(strategy, close, 250)
+
+    pd.testing.assert_series_equal(value, reference)
+    pd.testing.assert_frame_equal(orders, reference_orders)
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+import pytz
+
+from friday.benchmarks.fixtures import FixtureAPI, fixture_close, fixture_symbols
+from friday.data import Synthesizer
+from friday.simulation import SimulationRunner
+from friday.utils import get_trading_calendar
+
+
+def _synthesizer(path):
+    close = fixture_close(500)
+    config = {'assets': {'symbols': fixture_symbols()}, 'cache': {'path': str(path / 'bars')}, 'store': {'path': str(path / 'store')}}
+    today = datetime.now(pytz.timezone('US/Eastern')).date()
+
+    return Synthesizer(start=str(close.index[0].date()),
+                       end=str(close.index[-2].date()),
+                       simulation_start=str(get_trading_calendar().next_sessions(today, 2)[-1].date()),
+                       days=15,
+                       api=FixtureAPI(close),
+                       config=config), config
+
+
+@pytest.mark.parametrize('bootstrap', [{}, {'method': 'stationary'}])
+def test_results_do_not_depend_on_workers(tmp_path, bootstrap):
+    s, config = _synthesizer(tmp_path)
+    s.bootstrap.update(bootstrap)
+
+    single = SimulationRunner(s, config, workers=1, chunk_size=7, seed=42).run(20)
+    pooled = SimulationRunner(s, config, workers=2, chunk_size=3, seed=42).run(20)
+
+    assert single[0].shape[1] == 20
+    pd.testing.assert_frame_equal(single[0], pooled[0])
+    pd.testing.assert_frame_equal(single[1], pooled[1])
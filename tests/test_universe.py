@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+import vectorbt as vbt
+
+from friday.backtesting.universe import simulate_universe
+from friday.strategies import UniverseStrategy
+
+
+def _close(n_symbols=50, n_bars=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_bars, n_symbols)), axis=0))
+    for col, listed in enumerate(rng.integers(0, n_bars // 2, n_symbols)):
+        close[:listed if col >= 3 else 0, col] = np.nan                 # Late listings
+    return pd.DataFrame(close, pd.date_range('2015-01-01', periods=n_bars, freq='B'), [f'S{c}' for c in range(n_symbols)])
+
+
+@pytest.mark.parametrize('ranking', [{'top': 2}, {'top': 2, 'rank_by': 'ma_fast', 'above': 0}, {'top': 3, 'select': 'lowest'}])
+def test_call_seq_matches_auto_with_overlapping_groups(ranking):
+    close = _close()
+    symbols = list(close.columns)
+    strategy = UniverseStrategy({'assets': {'symbols': symbols},
+                                 'universe': {'groups': {'a': symbols[:30], 'b': symbols[20:]}, **ranking}})
+    data, size = strategy.strategy(close)
+
+    pf = simulate_universe(data, size)
+    auto = vbt.Portfolio.from_orders(close=data, size=size, size_type='targetpercent', price=data, cash_sharing=True,
+                                     init_cash=10000, group_by=True, call_seq='auto', freq='d')
+
+    assert len(pf.orders.records) == len(auto.orders.records)
+    np.testing.assert_allclose(pf.value().values, auto.value().values, rtol=1e-12)
@@ -0,0 +1,18 @@
+from multiprocessing import get_context
+
+import pandas as pd
+
+from friday.benchmarks.fixtures import fixture_close, fixture_symbols
+from friday.optimization import ParameterSweep, WalkForward
+from friday.strategies import Strategy
+
+
+def test_spawned_workers_match_single_process():
+    close = fixture_close(900)
+    sweep = ParameterSweep(Strategy({'assets': {'symbols': fixture_symbols()}}), {'ma_slow': [150, 200], 'tqqq_overbought': [75, 80]})
+
+    single = WalkForward(sweep, in_sample=300, out_of_sample=100, workers=1).run(close)
+    spawned = WalkForward(sweep, in_sample=300, out_of_sample=100, workers=2, mp_context=get_context('spawn')).run(close)
+
+    assert len(single) > 1
+    pd.testing.assert_frame_equal(single, spawned)